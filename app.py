@@ -1,19 +1,47 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import json
 import sqlite3
 import hashlib
+import functools
+import itertools
+import io
 import numpy as np
 from datetime import datetime
+from collections import deque
+from string import Template
 import time
-from openai import OpenAI
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openai import OpenAI, AsyncOpenAI
 import os
 import boto3
 import s3fs
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import NoCredentialsError, ClientError
 
+# orjson serializes datetimes natively and is much faster; fall back to stdlib json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# pyarrow ships with Streamlit; it builds columnar frames from record lists in C
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# reportlab is optional; without it the report download falls back to plain text
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.utils import simpleSplit
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
 class S3ConfigManager:
     """Manage S3 configuration and connection"""
     
@@ -192,6 +220,43 @@ class S3DataDiscovery:
             ErrorHandler.handle_s3_error(e, f"Loading {file_key}")
             return None
     
+    def load_json_files_from_s3(self, file_keys, max_workers=16):
+        """Load several JSON files concurrently, returning a dict of key to data"""
+        if not self.s3_client:
+            return {}
+        
+        loaded = {}
+        pending_keys = []
+        for file_key in file_keys:
+            cached_data = cache_manager.get_analysis_cache(cache_manager.get_cache_key(file_key, "s3_data"))
+            if cached_data:
+                loaded[file_key] = cached_data
+            else:
+                pending_keys.append(file_key)
+        
+        if not pending_keys:
+            return loaded
+        
+        # boto3 clients are thread-safe, so one client serves every worker
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending_keys))) as executor:
+            futures = {executor.submit(self._fetch_json_object, file_key): file_key for file_key in pending_keys}
+            for future in as_completed(futures):
+                file_key = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    ErrorHandler.handle_s3_error(e, f"Loading {file_key}")
+                    continue
+                cache_manager.set_analysis_cache(cache_manager.get_cache_key(file_key, "s3_data"), data)
+                loaded[file_key] = data
+        
+        return loaded
+    
+    def _fetch_json_object(self, file_key):
+        """Download and parse one JSON object (runs on a worker thread)"""
+        response = self.s3_client.get_object(Bucket=self.config.bucket_name, Key=file_key)
+        return json.loads(response['Body'].read())
+    
     def get_file_categories(self, discovered_files):
         """Categorize files based on naming patterns and folder structure"""
         categories = {}
@@ -254,9 +319,10 @@ class S3JSONReader:
             # Filter files that belong to this company (by folder structure or naming)
             company_files = self._filter_company_files(discovered_files, company_name)
             
-            # Read and categorize the data
+            # Read all files concurrently, then categorize the data
+            loaded_files = self.data_discovery.load_json_files_from_s3(list(company_files))
             for file_key, file_info in company_files.items():
-                data = self.data_discovery.load_json_from_s3(file_key)
+                data = loaded_files.get(file_key)
                 if data:
                     # Determine data type based on filename/folder
                     data_type = self._determine_data_type(file_info)
@@ -345,6 +411,9 @@ class S3JSONReader:
 class S3FileStorageManager:
     """Manage file uploads to S3 bucket for investee file storage"""
     
+    # Split larger files into parts and send up to four parts at once
+    TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=4)
+    
     def __init__(self):
         self.aws_access_key = self._get_config("AWS_ACCESS_KEY_ID")
         self.aws_secret_key = self._get_config("AWS_SECRET_ACCESS_KEY")
@@ -399,9 +468,9 @@ class S3FileStorageManager:
         else:
             return f"company_{company_id}/{timestamp}/{clean_filename}"
     
-    def upload_file(self, file_obj, company_id, filename):
+    def upload_file(self, file_obj, company_id, filename, s3_client=None):
         """Upload a file to S3 and return the S3 key"""
-        s3_client = self.get_s3_client()
+        s3_client = s3_client or self.get_s3_client()
         if not s3_client:
             raise Exception("S3 file storage not configured")
         
@@ -417,7 +486,8 @@ class S3FileStorageManager:
                 file_obj,
                 self.bucket_name,
                 s3_key,
-                ExtraArgs={'ServerSideEncryption': 'AES256'}
+                ExtraArgs={'ServerSideEncryption': 'AES256'},
+                Config=self.TRANSFER_CONFIG
             )
             
             return s3_key
@@ -425,6 +495,24 @@ class S3FileStorageManager:
         except Exception as e:
             raise Exception(f"Failed to upload file to S3: {str(e)}")
     
+    def upload_files(self, file_objs, company_id, max_workers=8):
+        """Upload several files concurrently, yielding (file_obj, s3_key, error) as each finishes"""
+        s3_client = self.get_s3_client()
+        if not s3_client:
+            for file_obj in file_objs:
+                yield file_obj, None, Exception("S3 file storage not configured")
+            return
+        
+        # boto3 clients are thread-safe, so one client serves every worker
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_objs))) as executor:
+            futures = {
+                executor.submit(self.upload_file, file_obj, company_id, file_obj.name, s3_client): file_obj
+                for file_obj in file_objs
+            }
+            for future in as_completed(futures):
+                error = future.exception()
+                yield futures[future], None if error else future.result(), error
+    
     def get_file_url(self, s3_key, expiration=3600):
         """Generate presigned URL for file download"""
         s3_client = self.get_s3_client()
@@ -510,22 +598,24 @@ class JSONSchemaAnalyzer:
         # Sample the first few records for analysis
         sample_size = min(5, len(json_data))
         sample_data = json_data[:sample_size]
+        if not all(isinstance(record, dict) for record in sample_data):
+            return "unknown"
         
-        # Convert to DataFrame for easier analysis
         try:
-            df = pd.DataFrame(sample_data)
-            columns = [col.lower() for col in df.columns]
+            # Lowercase the sampled column names once into one string for all pattern checks
+            column_names = dict.fromkeys(key for record in sample_data for key in record)
+            joined_columns = ' '.join(str(col).lower() for col in column_names)
             
             # Pattern matching for data types
-            if any(term in ' '.join(columns) for term in ['quarter', 'q3', 'q4', 'qoq']):
+            if any(term in joined_columns for term in ('quarter', 'q3', 'q4', 'qoq')):
                 return "quarterly"
-            elif any(term in ' '.join(columns) for term in ['churn', 'expansion', 'bridge']):
+            elif any(term in joined_columns for term in ('churn', 'expansion', 'bridge')):
                 return "bridge"
-            elif any(term in ' '.join(columns) for term in ['country', 'region', 'geographic']):
+            elif any(term in joined_columns for term in ('country', 'region', 'geographic')):
                 return "geographic"
-            elif any(term in ' '.join(columns) for term in ['customer', 'client', 'concentration']):
+            elif any(term in joined_columns for term in ('customer', 'client', 'concentration')):
                 return "customer"
-            elif any(term in ' '.join(columns) for term in ['month', 'monthly', 'mom']):
+            elif any(term in joined_columns for term in ('month', 'monthly', 'mom')):
                 return "monthly"
             else:
                 return "general"
@@ -1098,6 +1188,7 @@ class DynamicDashboardGenerator:
     
     def _generate_revenue_bridge_visualizations(self, df):
         """Generate visualizations specifically for revenue bridge analysis"""
+        import plotly.graph_objects as go
         st.write("### 🌊 Revenue Bridge Analysis")
         
         # Look for bridge-specific columns
@@ -1165,6 +1256,7 @@ class DynamicDashboardGenerator:
     
     def _generate_customer_analysis_visualizations(self, df):
         """Generate visualizations for customer analysis"""
+        import plotly.express as px
         st.write("### 👥 Customer Analysis")
         
         # Find customer and revenue columns
@@ -1208,6 +1300,7 @@ class DynamicDashboardGenerator:
     
     def _generate_geographic_visualizations(self, df):
         """Generate visualizations for geographic analysis"""
+        import plotly.express as px
         st.write("### 🌍 Geographic Analysis")
         
         # Find geographic and revenue columns
@@ -1249,6 +1342,7 @@ class DynamicDashboardGenerator:
     
     def _generate_quarterly_visualizations(self, df):
         """Generate visualizations for quarterly analysis"""
+        import plotly.express as px
         st.write("### 📊 Quarterly Growth Analysis")
         
         # Look for Q3 and Q4 columns or quarterly data
@@ -1298,6 +1392,7 @@ class DynamicDashboardGenerator:
     
     def _generate_monthly_trends_visualizations(self, df):
         """Generate visualizations for monthly trends - handles various data structures including JSON objects"""
+        import plotly.express as px
         st.write("### 📈 Monthly Revenue Trends")
         
         # Add debugging information (collapsible)
@@ -1365,6 +1460,7 @@ class DynamicDashboardGenerator:
     
     def _create_month_label_visualizations(self, df):
         """Create visualizations for Month_Label + Revenue structure"""
+        import plotly.express as px
         st.write("**Data Structure:** Month_Label + Revenue format detected")
         
         col1, col2 = st.columns(2)
@@ -1410,7 +1506,7 @@ class DynamicDashboardGenerator:
         # Summary metrics
         cols = st.columns(4)
         with cols[0]:
-            total_revenue = df['Revenue'].sum()
+            total_revenue = _column_total(df, 'Revenue')
             st.metric("Total Revenue", f"${total_revenue:,.2f}")
         with cols[1]:
             avg_monthly = df['Revenue'].mean()
@@ -1425,6 +1521,7 @@ class DynamicDashboardGenerator:
     
     def _create_individual_month_visualizations(self, df, month_cols):
         """Create visualizations for individual month columns"""
+        import plotly.express as px
         st.write("**Data Structure:** Individual month columns detected")
         
         # Create monthly totals
@@ -1475,6 +1572,7 @@ class DynamicDashboardGenerator:
     
     def _create_json_object_visualizations(self, df):
         """Handle JSON objects or nested data structures"""
+        import plotly.express as px
         st.write("**Data Structure:** JSON objects detected - attempting to parse")
         
         # Try to flatten JSON objects
@@ -1527,6 +1625,7 @@ class DynamicDashboardGenerator:
     
     def _create_timeseries_visualizations(self, df, date_col, revenue_col):
         """Create visualizations for time-series data"""
+        import plotly.express as px
         st.write("**Data Structure:** Time-series format detected")
         
         col1, col2 = st.columns(2)
@@ -1607,6 +1706,7 @@ class DynamicDashboardGenerator:
     
     def _create_bar_chart(self, df, metrics):
         """Create a bar chart visualization"""
+        import plotly.express as px
         revenue_cols = metrics.get('revenue_columns', [])
         id_cols = metrics.get('id_columns', [])
         
@@ -1632,6 +1732,7 @@ class DynamicDashboardGenerator:
     
     def _create_line_chart(self, df, metrics):
         """Create a line chart for time series data"""
+        import plotly.express as px
         date_cols = metrics.get('date_columns', [])
         revenue_cols = metrics.get('revenue_columns', [])
         
@@ -1654,6 +1755,7 @@ class DynamicDashboardGenerator:
     
     def _create_pie_chart(self, df, metrics):
         """Create a pie chart for categorical data"""
+        import plotly.express as px
         categorical_cols = metrics.get('categorical_columns', [])
         revenue_cols = metrics.get('revenue_columns', [])
         
@@ -1701,6 +1803,7 @@ class DynamicDashboardGenerator:
     
     def _create_treemap(self, df, metrics):
         """Create a treemap visualization"""
+        import plotly.express as px
         id_cols = metrics.get('id_columns', [])
         revenue_cols = metrics.get('revenue_columns', [])
         
@@ -1775,6 +1878,17 @@ class DynamicDashboardGenerator:
             st.dataframe(df.head(100), use_container_width=True)
 
 # Display function for chatbot
+# Older exchanges are dropped so session state and re-renders stay small
+CHAT_HISTORY_LIMIT = 20
+
+def get_chat_history(key):
+    """Return the bounded chat history stored under key, creating it if needed"""
+    history = st.session_state.get(key)
+    if not isinstance(history, deque):
+        history = deque(history or (), maxlen=CHAT_HISTORY_LIMIT)
+        st.session_state[key] = history
+    return history
+
 def display_chatbot(data, view_title):
     """Display chatbot interface for data analysis"""
     st.subheader("💬 AI Data Analyst")
@@ -1786,8 +1900,7 @@ def display_chatbot(data, view_title):
     
     # Initialize chat history
     chat_key = f"chat_history_{view_title}"
-    if chat_key not in st.session_state:
-        st.session_state[chat_key] = []
+    get_chat_history(chat_key)
     
     # Suggestion buttons
     suggestions = [
@@ -1837,7 +1950,7 @@ def display_chatbot(data, view_title):
     # Display chat history
     if st.session_state[chat_key]:
         st.markdown("### 💬 Chat History")
-        for i, message in enumerate(reversed(st.session_state[chat_key][-10:])):  # Show last 10 messages
+        for i, message in enumerate(reversed(list(st.session_state[chat_key])[-10:])):  # Show last 10 messages
             if message["role"] == "user":
                 st.markdown(f"**You:** {message['content']}")
             else:
@@ -1845,15 +1958,14 @@ def display_chatbot(data, view_title):
             st.markdown("---")
 
 def display_quarterly_analysis(df, data, view_title):
+    import plotly.express as px
     st.header("📅 Quarterly Revenue & QoQ Growth Analysis")
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Key Metrics")
-        total_q3 = df['Quarter 3 Revenue'].sum()
-        total_q4 = df['Quarter 4 Revenue'].sum()
-        total_variance = df['Variance'].sum()
+        total_q3, total_q4, total_variance = _column_totals(df, ['Quarter 3 Revenue', 'Quarter 4 Revenue', 'Variance'])
         
         st.metric("Total Q3 Revenue", f"${total_q3:,.2f}")
         st.metric("Total Q4 Revenue", f"${total_q4:,.2f}")
@@ -1887,46 +1999,18 @@ def display_quarterly_analysis(df, data, view_title):
     st.markdown("---")
     display_chatbot_with_schema(data, view_title)
 
-def display_churn_analysis(df, data, view_title):
-    st.header("🔄 Revenue Bridge & Churn Analysis")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        total_churned = df['Churned Revenue'].sum()
-        st.metric("Total Churned Revenue", f"${total_churned:,.2f}")
-        
-    with col2:
-        total_new = df['New Revenue'].sum()
-        st.metric("Total New Revenue", f"${total_new:,.2f}")
-        
-    with col3:
-        total_expansion = df['Expansion Revenue'].sum()
-        st.metric("Total Expansion Revenue", f"${total_expansion:,.2f}")
-    
-    # Revenue bridge waterfall chart
-    st.subheader("Revenue Bridge Analysis")
-    
-    revenue_categories = ['Sep Revenue', 'New Revenue', 'Expansion Revenue', 
-                         'Contraction Revenue', 'Churned Revenue', 'Oct Revenue']
-    
-    q3_total = df['Quarter 3 Revenue'].sum()
-    new_total = df['New Revenue'].sum()
-    expansion_total = df['Expansion Revenue'].sum()
-    contraction_total = -df['Contraction Revenue'].sum()
-    churned_total = -df['Churned Revenue'].sum()
-    q4_total = df['Quarter 4 Revenue'].sum()
-    
-    values = [q3_total, new_total, expansion_total, contraction_total, churned_total, q4_total]
-    
+@st.cache_data(ttl=600, show_spinner=False)
+def _bridge_waterfall_figure(categories, values):
+    """Build the interactive revenue bridge waterfall (cached across reruns)"""
+    import plotly.graph_objects as go
     fig = go.Figure(go.Waterfall(
         name="Revenue Bridge",
         orientation="v",
         measure=["absolute", "relative", "relative", "relative", "relative", "total"],
-        x=revenue_categories,
+        x=list(categories),
         text=[f"${v:,.0f}" for v in values],
         textposition="outside",
-        y=values,
+        y=list(values),
         connector={"line": {"color": "rgb(63, 63, 63)", "width": 2}},
         increasing={"marker": {"color": "#2E8B57"}},  # Sea green for positive
         decreasing={"marker": {"color": "#DC143C"}},  # Crimson for negative  
@@ -1948,7 +2032,36 @@ def display_churn_analysis(df, data, view_title):
         paper_bgcolor='rgba(0,0,0,0)',
         hovermode='x unified'
     )
+    return fig
+
+def display_churn_analysis(df, data, view_title):
+    st.header("🔄 Revenue Bridge & Churn Analysis")
+    
+    # All six bridge components are reduced together
+    q3_total, new_total, expansion_total, contraction_total, churned_total, q4_total = _column_totals(
+        df, _resolve_bridge_columns(df)
+    )
     
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Total Churned Revenue", f"${churned_total:,.2f}")
+        
+    with col2:
+        st.metric("Total New Revenue", f"${new_total:,.2f}")
+        
+    with col3:
+        st.metric("Total Expansion Revenue", f"${expansion_total:,.2f}")
+    
+    # Revenue bridge waterfall chart
+    st.subheader("Revenue Bridge Analysis")
+    
+    revenue_categories = ['Sep Revenue', 'New Revenue', 'Expansion Revenue', 
+                         'Contraction Revenue', 'Churned Revenue', 'Oct Revenue']
+    
+    values = [q3_total, new_total, expansion_total, -contraction_total, -churned_total, q4_total]
+    
+    fig = _bridge_waterfall_figure(tuple(revenue_categories), tuple(float(v) for v in values))
     st.plotly_chart(fig, use_container_width=True)
     
     # Detailed table
@@ -1960,6 +2073,7 @@ def display_churn_analysis(df, data, view_title):
     display_chatbot_with_schema(data, view_title)
 
 def display_country_analysis(df, data, view_title):
+    import plotly.express as px
     st.header("🌍 Country-wise Revenue Analysis")
     
     # Remove null values and sort by revenue
@@ -1984,7 +2098,7 @@ def display_country_analysis(df, data, view_title):
     # Key metrics
     col1, col2, col3 = st.columns(3)
     with col1:
-        total_revenue = df_clean['Yearly Revenue'].sum()
+        total_revenue = _column_total(df_clean, 'Yearly Revenue')
         st.metric("Total Global Revenue", f"${total_revenue:,.2f}")
     with col2:
         top_country = df_clean.iloc[0]
@@ -2002,6 +2116,8 @@ def display_country_analysis(df, data, view_title):
     display_chatbot_with_schema(data, view_title)
 
 def display_customer_concentration_analysis(df, data, view_title):
+    import plotly.express as px
+    import plotly.graph_objects as go
     st.header("👥 Customer Concentration Analysis")
     
     # Sort by revenue descending
@@ -2011,10 +2127,11 @@ def display_customer_concentration_analysis(df, data, view_title):
     
     with col1:
         st.subheader("Key Metrics")
-        total_revenue = df_sorted['Total Revenue'].sum()
+        sorted_revenue = df_sorted['Total Revenue'].to_numpy(dtype=np.float64, na_value=0.0)
+        total_revenue = sorted_revenue.sum()
         top_customer = df_sorted.iloc[0]
-        top_5_revenue = df_sorted.head(5)['Total Revenue'].sum()
-        top_10_revenue = df_sorted.head(10)['Total Revenue'].sum()
+        top_5_revenue = sorted_revenue[:5].sum()
+        top_10_revenue = sorted_revenue[:10].sum()
         
         st.metric("Total Revenue", f"${total_revenue:,.2f}")
         st.metric("Top Customer", top_customer['Customer Name'])
@@ -2145,6 +2262,8 @@ def display_customer_concentration_analysis(df, data, view_title):
     display_chatbot_with_schema(data, view_title)
 
 def display_month_on_month_analysis(df, data, view_title):
+    import plotly.express as px
+    import plotly.graph_objects as go
     st.header("📈 Month-on-Month Revenue Analysis")
     
     # Convert Month to datetime
@@ -2156,7 +2275,7 @@ def display_month_on_month_analysis(df, data, view_title):
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_revenue = df['Revenue'].sum()
+        total_revenue = _column_total(df, 'Revenue')
         st.metric("Total Revenue (2024)", f"${total_revenue:,.2f}")
     
     with col2:
@@ -2323,7 +2442,8 @@ def json_serializer(obj):
         return obj.item()
     elif isinstance(obj, np.ndarray):
         return obj.tolist()
-    elif pd.isna(obj):
+    elif pd.api.types.is_scalar(obj) and pd.isna(obj):
+        # pd.isna on list-likes returns an array, whose truth value would raise
         return None
     else:
         return str(obj)
@@ -2340,6 +2460,89 @@ def safe_json_dumps(data):
             return str(obj)
         return json.dumps(data, default=fallback_serializer)
 
+def _bounded_dumps(obj, max_chars):
+    """Serialize obj as indented JSON, stopping once max_chars have been written"""
+    buffer = io.StringIO()
+    for chunk in json.JSONEncoder(indent=2, default=str).iterencode(obj):
+        buffer.write(chunk)
+        if buffer.tell() >= max_chars:
+            break
+    return buffer.getvalue()[:max_chars]
+
+def _numeric_column(df, column):
+    """Return column coerced to numbers, or an all-NaN series when it is missing"""
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype=float)
+    return pd.to_numeric(df[column], errors='coerce')
+
+def records_to_dataframe(json_data):
+    """Build a DataFrame from record data, converting through Arrow when every record shares one flat layout"""
+    if pa is not None and isinstance(json_data, list) and json_data and isinstance(json_data[0], dict):
+        # Arrow takes its schema from the first record, so keys found only in later records would be dropped
+        keys = json_data[0].keys()
+        if all(isinstance(record, dict) and record.keys() == keys for record in json_data):
+            try:
+                table = pa.Table.from_pylist(json_data)
+            except (pa.ArrowException, TypeError, ValueError, OverflowError):
+                table = None  # Mixed-type columns or integers beyond int64; let the DataFrame constructor handle them
+            # Nested values would come back as arrays rather than the lists pandas keeps
+            if table is not None and not any(pa.types.is_nested(field.type) for field in table.schema):
+                return table.to_pandas()
+    return pd.DataFrame(json_data)
+
+def _downcast_int_columns(df):
+    """Store int64 columns as int32 when every value fits, halving their footprint"""
+    int32_info = np.iinfo(np.int32)
+    for column in df.select_dtypes(include='int64').columns:
+        values = df[column]
+        if values.empty or (values.min() >= int32_info.min and values.max() <= int32_info.max):
+            df[column] = values.astype(np.int32)
+    return df
+
+# Accepted column names for each revenue bridge component, in waterfall order
+BRIDGE_COLUMN_CANDIDATES = {
+    'q3': ('Quarter 3 Revenue', 'Q3 Revenue'),
+    'new': ('New Revenue',),
+    'expansion': ('Expansion Revenue',),
+    'contraction': ('Contraction Revenue',),
+    'churned': ('Churned Revenue',),
+    'q4': ('Quarter 4 Revenue', 'Q4 Revenue')
+}
+
+def _resolve_bridge_columns(df):
+    """Map each bridge component to the first candidate column present in df (or None)"""
+    return [
+        next((column for column in candidates if column in df.columns), None)
+        for candidates in BRIDGE_COLUMN_CANDIDATES.values()
+    ]
+
+def _column_total(df, column):
+    """Sum one column as float64 in NumPy; nulls count as zero"""
+    return float(df[column].to_numpy(dtype=np.float64, na_value=0.0).sum())
+
+def _column_totals(df, columns):
+    """Sum the given columns in one stacked reduction; missing columns and nulls count as zero"""
+    stacked = np.vstack([
+        df[column].to_numpy(dtype=np.float64, na_value=0.0) if column is not None else np.zeros(len(df))
+        for column in columns
+    ])
+    return stacked.sum(axis=1)
+
+def _top_k_sum(values, k):
+    """Sum of the k largest entries of a NaN-free array, found by partition instead of sorting"""
+    if len(values) <= k:
+        return float(values.sum())
+    return float(values[np.argpartition(values, -k)[-k:]].sum())
+
+def _top_k_rows(df, column, k=10):
+    """Return the k rows with the largest values in column, largest first"""
+    values = _numeric_column(df, column).to_numpy(dtype=np.float64)
+    candidates = np.flatnonzero(~np.isnan(values))
+    if len(candidates) > k:
+        # Partial selection of the top k, then sort just those
+        candidates = np.sort(candidates[np.argpartition(values[candidates], -k)[-k:]])
+    return df.iloc[candidates[np.argsort(-values[candidates], kind='stable')]]
+
 st.set_page_config(
     page_title="Revenue Analytics Dashboard",
     page_icon="📊",
@@ -2590,6 +2793,20 @@ class DatabaseManager:
         conn.close()
         return file_id
     
+    def save_uploaded_files(self, rows):
+        """Save metadata for several uploaded files in one transaction.
+        rows: (company_id, original_filename, s3_key, file_type, file_size) tuples"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.executemany(
+            """INSERT INTO uploaded_files 
+               (company_id, original_filename, s3_key, file_type, file_size) 
+               VALUES (?, ?, ?, ?, ?)""",
+            rows
+        )
+        conn.commit()
+        conn.close()
+    
     def get_uploaded_files(self, company_id):
         """Get all uploaded files for a company"""
         conn = sqlite3.connect(self.db_path)
@@ -2682,6 +2899,7 @@ class DashboardVisualizer:
         pass
     
     def create_quarterly_revenue_charts(self, data):
+        import plotly.express as px
         df = pd.DataFrame(data)
         
         col1, col2 = st.columns(2)
@@ -2728,6 +2946,7 @@ class DashboardVisualizer:
                 st.plotly_chart(fig2, use_container_width=True)
     
     def create_country_wise_charts(self, data):
+        import plotly.express as px
         df = pd.DataFrame(data)
         
         col1, col2 = st.columns(2)
@@ -2755,6 +2974,7 @@ class DashboardVisualizer:
             st.warning("Could not find country and revenue columns")
     
     def create_customer_concentration_charts(self, data):
+        import plotly.express as px
         df = pd.DataFrame(data)
         
         customer_col = None
@@ -2828,6 +3048,8 @@ class ChatBot:
 
 def load_dynamic_json_analyses(s3_config=None, use_s3=False, force_refresh=False):
     """Load JSON analyses from S3 bucket or local files with dynamic detection"""
+    # Chat contexts describe the datasets that are about to be replaced
+    st.session_state.pop('_ctx_cache', None)
     
     if use_s3 and s3_config and s3_config.is_configured():
         return load_analyses_from_s3(s3_config, force_refresh=force_refresh)
@@ -2856,6 +3078,11 @@ def load_analyses_from_s3(s3_config, force_refresh=False):
         # Get file categories from discovery
         file_categories = s3_discovery.get_file_categories(discovered_files)
         
+        # Fetch every file in parallel before categorizing
+        loaded_files = s3_discovery.load_json_files_from_s3(
+            [file_info['original_key'] for files in file_categories.values() for file_info in files]
+        )
+        
         analyses = {}
         
         for category, files in file_categories.items():
@@ -2863,8 +3090,7 @@ def load_analyses_from_s3(s3_config, force_refresh=False):
             
             for file_info in files:
                 try:
-                    # Load JSON data from S3
-                    json_data = s3_discovery.load_json_from_s3(file_info['original_key'])
+                    json_data = loaded_files.get(file_info['original_key'])
                     
                     if json_data:
                         # Analyze schema and enhance categorization
@@ -2942,6 +3168,18 @@ def load_real_json_analyses():
     """Legacy function - redirects to local loading"""
     return load_analyses_from_local()
 
+def build_executive_summary_prompt(json_data, analysis_type, schema=None):
+    """Build the executive summary prompt for a dataset"""
+    # Prepare data context (limit size for API)
+    data_sample = json_data[:50] if isinstance(json_data, list) and len(json_data) > 50 else json_data
+    data_context = _bounded_dumps(data_sample, 8000)  # Limit context size
+    
+    # Generate schema-aware prompt
+    if schema:
+        return generate_dynamic_prompt(data_context, analysis_type, schema)
+    # Fallback to static prompts
+    return generate_static_prompt(data_context, analysis_type)
+
 def generate_ai_executive_summary(json_data, analysis_type, schema=None):
     """Generate AI-powered executive summary using OpenAI with dynamic schema awareness"""
     
@@ -2952,22 +3190,12 @@ def generate_ai_executive_summary(json_data, analysis_type, schema=None):
     
     try:
         client = OpenAI(api_key=api_key)
-        
-        # Prepare data context (limit size for API)
-        data_sample = json_data[:50] if isinstance(json_data, list) and len(json_data) > 50 else json_data
-        data_context = json.dumps(data_sample, indent=2, default=str)[:8000]  # Limit context size
-        
-        # Generate schema-aware prompt
-        if schema:
-            prompt = generate_dynamic_prompt(data_context, analysis_type, schema)
-        else:
-            # Fallback to static prompts
-            prompt = generate_static_prompt(data_context, analysis_type)
+        prompt = build_executive_summary_prompt(json_data, analysis_type, schema)
         
         response = client.chat.completions.create(
             model="gpt-4",
             messages=[
-                {"role": "system", "content": "You are a world-class financial analyst and business intelligence expert with 15+ years of experience in revenue operations, customer analytics, and strategic business planning. Provide actionable insights with specific metrics and recommendations."},
+                {"role": "system", "content": EXECUTIVE_SUMMARY_SYSTEM_ROLE},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=1500,
@@ -2979,57 +3207,73 @@ def generate_ai_executive_summary(json_data, analysis_type, schema=None):
     except Exception as e:
         return generate_fallback_summary(json_data, analysis_type)
 
-def generate_dynamic_prompt(data_context, analysis_type, schema):
-    """Generate dynamic prompts based on schema analysis"""
-    
-    metrics = schema.get('metrics', {})
-    columns = schema.get('columns', {})
-    confidence = schema.get('confidence_score', 0)
-    suggested_viz = schema.get('suggested_visualizations', [])
-    
-    # Extract key column information
-    revenue_cols = metrics.get('revenue_columns', [])
-    date_cols = metrics.get('date_columns', [])
-    id_cols = metrics.get('id_columns', [])
-    categorical_cols = metrics.get('categorical_columns', [])
+async def _request_executive_summaries(api_key, prompts):
+    """Send every summary prompt concurrently; failed requests come back as exceptions"""
+    # Closing the client inside the loop keeps its connection pool from outliving asyncio.run
+    async with AsyncOpenAI(api_key=api_key) as client:
+        async def summarize(prompt):
+            response = await client.chat.completions.create(
+                model="gpt-4",
+                messages=[
+                    {"role": "system", "content": EXECUTIVE_SUMMARY_SYSTEM_ROLE},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=1500,
+                temperature=0.2
+            )
+            return response.choices[0].message.content
+        
+        return await asyncio.gather(*(summarize(prompt) for prompt in prompts), return_exceptions=True)
+
+def generate_all_executive_summaries(tab_datasets):
+    """Generate executive summaries for several tabs in one concurrent batch"""
+    api_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("openai_api_key", "")
+    if not api_key:
+        return {category: generate_fallback_summary(data, category) for category, data in tab_datasets.items()}
     
-    # Build dynamic context description
-    context_desc = f"This dataset contains {len(columns)} columns with {len(json.loads(data_context)) if isinstance(json.loads(data_context), list) else 1} records."
+    summaries = {}
+    prompts = {}
+    for category, data in tab_datasets.items():
+        try:
+            prompts[category] = build_executive_summary_prompt(data, category, JSONSchemaAnalyzer().analyze_json_schema(data, category))
+        except Exception:
+            # A tab whose prompt cannot be built gets the rule-based summary, as the single-tab generator does
+            summaries[category] = generate_fallback_summary(data, category)
     
-    if revenue_cols:
-        context_desc += f" Key revenue columns: {', '.join(revenue_cols)}."
-    if date_cols:
-        context_desc += f" Time-based columns: {', '.join(date_cols)}."
-    if id_cols:
-        context_desc += f" Identifier columns: {', '.join(id_cols)}."
-    if categorical_cols:
-        context_desc += f" Categorical dimensions: {', '.join(categorical_cols)}."
+    results = asyncio.run(_request_executive_summaries(api_key, list(prompts.values()))) if prompts else []
+    for category, result in zip(prompts, results):
+        summaries[category] = result if isinstance(result, str) else generate_fallback_summary(tab_datasets[category], category)
     
-    # Generate analysis-specific sections based on detected patterns
+    # Keep the tabs in their original order
+    return {category: summaries[category] for category in tab_datasets}
+
+@functools.lru_cache(maxsize=16)
+def _build_analysis_sections(has_revenue, has_dates, has_categories, has_ids):
+    """Assemble the prompt sections for a schema fingerprint"""
     analysis_sections = []
     
-    if revenue_cols:
+    if has_revenue:
         analysis_sections.append("""
 ## 📈 Financial Performance Analysis
 - Calculate total and average values for revenue metrics
 - Identify top performers and key contributors
 - Analyze revenue distribution patterns""")
     
-    if date_cols and revenue_cols:
+    if has_dates and has_revenue:
         analysis_sections.append("""
 ## 📅 Temporal Analysis
 - Identify trends and patterns over time
 - Highlight seasonal variations or growth periods
 - Assess consistency and volatility""")
     
-    if categorical_cols:
+    if has_categories:
         analysis_sections.append("""
 ## 🎯 Segmentation Analysis
 - Break down performance by key segments
 - Identify high-performing categories
 - Assess concentration and diversification""")
     
-    if id_cols and revenue_cols:
+    if has_ids and has_revenue:
         analysis_sections.append("""
 ## 🏆 Performance Ranking
 - Rank entities by key performance metrics
@@ -3050,6 +3294,37 @@ def generate_dynamic_prompt(data_context, analysis_type, schema):
 - Suggest optimization strategies
 - Recommend areas for deeper investigation""")
     
+    return ''.join(analysis_sections)
+
+def generate_dynamic_prompt(data_context, analysis_type, schema):
+    """Generate dynamic prompts based on schema analysis"""
+    
+    metrics = schema.get('metrics', {})
+    columns = schema.get('columns', {})
+    confidence = schema.get('confidence_score', 0)
+    suggested_viz = schema.get('suggested_visualizations', [])
+    
+    # Extract key column information
+    revenue_cols = metrics.get('revenue_columns', [])
+    date_cols = metrics.get('date_columns', [])
+    id_cols = metrics.get('id_columns', [])
+    categorical_cols = metrics.get('categorical_columns', [])
+    
+    # Build dynamic context description
+    context_desc = f"This dataset contains {len(columns)} columns with {len(json.loads(data_context)) if isinstance(json.loads(data_context), list) else 1} records."
+    
+    if revenue_cols:
+        context_desc += f" Key revenue columns: {', '.join(revenue_cols)}."
+    if date_cols:
+        context_desc += f" Time-based columns: {', '.join(date_cols)}."
+    if id_cols:
+        context_desc += f" Identifier columns: {', '.join(id_cols)}."
+    if categorical_cols:
+        context_desc += f" Categorical dimensions: {', '.join(categorical_cols)}."
+    
+    # Analysis sections depend only on which column groups were detected
+    analysis_sections = _build_analysis_sections(bool(revenue_cols), bool(date_cols), bool(categorical_cols), bool(id_cols))
+    
     # Combine into full prompt
     prompt = f"""You are analyzing a {analysis_type} dataset with automatically detected schema.
 
@@ -3062,32 +3337,33 @@ Schema Confidence: {confidence}%
 Suggested Visualizations: {', '.join(suggested_viz)}
 
 Please provide a comprehensive executive summary with the following sections:
-{''.join(analysis_sections)}
+{analysis_sections}
 
 Focus on the actual data patterns you observe and provide specific, actionable insights based on the metrics and dimensions available in this dataset."""
     
     return prompt
 
-def generate_static_prompt(data_context, analysis_type):
-    """Generate static prompts for known analysis types (fallback)"""
-    
-    prompts = {
-        "quarterly": f"""You are analyzing Q3 to Q4 quarterly revenue performance data. This dataset contains customer-level revenue data showing Quarter 3 Revenue, Quarter 4 Revenue, Variance (absolute change), and Percentage of Variance (growth rate).
+# Precompiled fallback prompts, filled with the serialized data sample
+STATIC_PROMPTS = {
+    "quarterly": Template("""You are analyzing Q3 to Q4 quarterly revenue performance data. This dataset contains customer-level revenue data showing Quarter 3 Revenue, Quarter 4 Revenue, Variance (absolute change), and Percentage of Variance (growth rate).
 
 Data Context:
-{data_context}
+${data_context}
 
-Provide a comprehensive executive summary analyzing customer growth patterns, revenue variance, and business performance.""",
+Provide a comprehensive executive summary analyzing customer growth patterns, revenue variance, and business performance."""),
 
-        "general": f"""You are analyzing a business dataset to provide strategic insights.
+    "general": Template("""You are analyzing a business dataset to provide strategic insights.
 
 Data Context:
-{data_context}
+${data_context}
 
-Please provide a comprehensive analysis with key insights, trends, and recommendations based on the available data."""
-    }
-    
-    return prompts.get(analysis_type, prompts["general"])
+Please provide a comprehensive analysis with key insights, trends, and recommendations based on the available data.""")
+}
+
+def generate_static_prompt(data_context, analysis_type):
+    """Generate static prompts for known analysis types (fallback)"""
+    template = STATIC_PROMPTS.get(analysis_type, STATIC_PROMPTS["general"])
+    return template.substitute(data_context=data_context)
 
 def generate_schema_aware_chatbot_response(question, json_data, analysis_type, schema=None):
     """Generate chatbot responses with schema awareness"""
@@ -3113,7 +3389,7 @@ def generate_schema_aware_chatbot_response(question, json_data, analysis_type, s
         
         # Sample data for context
         data_sample = json_data[:10] if isinstance(json_data, list) and len(json_data) > 10 else json_data
-        data_context = json.dumps(data_sample, indent=2, default=str)[:2000]
+        data_context = _bounded_dumps(data_sample, 2000)
         
         prompt = f"""You are analyzing {analysis_type} data. {context_info}
 
@@ -3164,14 +3440,30 @@ class OpenAIChatbot:
         return f"I can help you analyze {self.data_type} data. Try asking about totals, averages, or top performers."
 
 # Update display_chatbot to use schema-aware chatbot
+@st.cache_resource
+def get_llm_event_loop():
+    """Background event loop shared by every session for blocking LLM calls"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="llm-event-loop", daemon=True).start()
+    return loop
+
+def submit_llm_call(func, *args):
+    """Run a blocking LLM call off the script thread and return its future"""
+    return asyncio.run_coroutine_threadsafe(asyncio.to_thread(func, *args), get_llm_event_loop())
+
 def display_universal_chatbot():
     """Display universal AI assistant in sidebar for general business questions"""
     st.sidebar.subheader("🤖 AI Assistant")
     st.sidebar.caption("General business & investment questions")
     
     # Initialize universal chatbot session state
-    if "universal_chat_history" not in st.session_state:
-        st.session_state.universal_chat_history = []
+    get_chat_history("universal_chat_history")
+    
+    # Collect an answer that finished in the background since the last run
+    pending = st.session_state.get("universal_pending")
+    if pending and pending["future"].done():
+        collect_universal_chatbot_answer(pending)
+        pending = None
     
     # Quick action buttons
     st.sidebar.write("**Quick Questions:**")
@@ -3188,11 +3480,11 @@ def display_universal_chatbot():
     for i, question in enumerate(quick_questions):
         if i % 2 == 0:
             with col1:
-                if st.button(question, key=f"quick_{i}", help=f"Ask: {question}"):
+                if st.button(question, key=f"quick_{i}", help=f"Ask: {question}", disabled=bool(pending)):
                     question_clicked = question
         else:
             with col2:
-                if st.button(question, key=f"quick_{i}", help=f"Ask: {question}"):
+                if st.button(question, key=f"quick_{i}", help=f"Ask: {question}", disabled=bool(pending)):
                     question_clicked = question
     
     # Chat input
@@ -3205,16 +3497,29 @@ def display_universal_chatbot():
     # Process question (either from input or quick button)
     question_to_process = question_clicked or user_question
     
-    if st.sidebar.button("Send", key="universal_send") or question_clicked:
+    # One question at a time: asking is disabled until the pending answer arrives
+    if st.sidebar.button("Send", key="universal_send", disabled=bool(pending)) or question_clicked:
         if question_to_process and question_to_process.strip():
-            # Get response from universal chatbot
-            response = get_universal_chatbot_response(question_to_process)
-            
-            # Add to chat history
-            st.session_state.universal_chat_history.append({
-                "question": question_to_process,
-                "answer": response
-            })
+            # Secrets and caches are read here, on the script thread; the worker only gets plain values
+            api_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("openai_api_key", "")
+            cached_answer = get_universal_answer_cache().get(question_to_process.strip().lower())
+            if not api_key:
+                st.session_state.universal_chat_history.append({
+                    "question": question_to_process,
+                    "answer": "⚠️ AI Assistant unavailable. OpenAI API key not configured."
+                })
+            elif cached_answer:
+                # Repeated questions (e.g. the quick-question buttons) are answered without a call
+                st.session_state.universal_chat_history.append({
+                    "question": question_to_process,
+                    "answer": cached_answer
+                })
+            else:
+                # Ask in the background so the rest of the page keeps rendering
+                st.session_state.universal_pending = {
+                    "question": question_to_process,
+                    "future": submit_llm_call(get_universal_chatbot_response, question_to_process, api_key)
+                }
             
             # Clear input if it was typed (not from quick button)
             if not question_clicked:
@@ -3222,10 +3527,14 @@ def display_universal_chatbot():
             
             st.rerun()
     
+    if pending:
+        with st.sidebar:
+            poll_universal_chatbot_answer()
+    
     # Display chat history (last 3 exchanges to save space)
     if st.session_state.universal_chat_history:
         st.sidebar.write("**Recent Conversations:**")
-        for exchange in st.session_state.universal_chat_history[-3:]:
+        for exchange in list(st.session_state.universal_chat_history)[-3:]:
             with st.sidebar.container():
                 st.write(f"**Q:** {exchange['question']}")
                 st.write(f"**A:** {exchange['answer'][:200]}{'...' if len(exchange['answer']) > 200 else ''}")
@@ -3233,23 +3542,46 @@ def display_universal_chatbot():
         
         # Clear chat history button
         if st.sidebar.button("Clear History", key="clear_universal_chat"):
-            st.session_state.universal_chat_history = []
+            st.session_state.universal_chat_history.clear()
             st.rerun()
 
-def get_universal_chatbot_response(question):
-    """Get response from universal AI assistant"""
-    api_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("openai_api_key", "")
-    
-    if not api_key:
-        return "⚠️ AI Assistant unavailable. OpenAI API key not configured."
-    
+@st.fragment(run_every=1)
+def poll_universal_chatbot_answer():
+    """Show a thinking indicator and rerun the app once the answer is stored"""
+    pending = st.session_state.get("universal_pending")
+    if not pending or pending["future"].done():
+        if pending:
+            collect_universal_chatbot_answer(pending)
+        # The full rerun draws the answer in the history and stops this fragment's polling
+        st.rerun()
+    st.info(f"⏳ Thinking about: {pending['question']}")
+
+def collect_universal_chatbot_answer(pending):
+    """Move a finished background answer into the chat history, caching it when the call succeeded"""
     try:
-        client = OpenAI(api_key=api_key)
-        
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": """You are a senior business consultant and investment advisor with expertise across multiple domains including:
+        answer = pending["future"].result()
+        get_universal_answer_cache()[pending["question"].strip().lower()] = answer
+    except Exception as e:
+        answer = f"⚠️ Error getting response: {str(e)}"
+    st.session_state.universal_chat_history.append({
+        "question": pending["question"],
+        "answer": answer
+    })
+    del st.session_state["universal_pending"]
+
+@st.cache_resource(ttl=86400)
+def get_universal_answer_cache():
+    """Answers to normalized assistant questions, shared by every session"""
+    return {}
+
+def get_universal_chatbot_response(question, api_key):
+    """Ask GPT-4o a general question; runs on a worker thread, so it must not touch Streamlit"""
+    client = OpenAI(api_key=api_key)
+    
+    response = client.chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": """You are a senior business consultant and investment advisor with expertise across multiple domains including:
                 - SaaS and subscription business models
                 - Revenue operations and financial metrics  
                 - Market analysis and competitive intelligence
@@ -3262,17 +3594,16 @@ RESPONSE STYLE:
 - Include specific metrics or benchmarks when relevant
 - Maintain professional, executive-level guidance
 - Avoid overly technical jargon"""},
-                {"role": "user", "content": question}
-            ],
-            max_tokens=300,
-            temperature=0.3
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"⚠️ Error getting response: {str(e)}"
+            {"role": "user", "content": question}
+        ],
+        max_tokens=300,
+        temperature=0.3
+    )
+    return response.choices[0].message.content.strip()
 
+@st.fragment
 def display_chatbot_with_schema(data, view_title, schema=None):
-    """Display chatbot interface with schema-aware responses"""
+    """Display chatbot interface with schema-aware responses; reruns on its own without redrawing the charts"""
     st.subheader("💬 AI Data Analyst")
     st.markdown("Ask questions about the data, trends, insights, or get analysis recommendations.")
     
@@ -3338,8 +3669,7 @@ def display_chatbot_with_schema(data, view_title, schema=None):
     
     # Chat interface
     chat_key = f"chat_history_{view_title}"
-    if chat_key not in st.session_state:
-        st.session_state[chat_key] = []
+    get_chat_history(chat_key)
     
     # Handle pending questions from suggestion buttons
     pending_key = f'pending_question_{view_title}'
@@ -3347,34 +3677,37 @@ def display_chatbot_with_schema(data, view_title, schema=None):
         question = st.session_state[pending_key]
         del st.session_state[pending_key]
         
-        # Generate dynamic executive summary for this data
         executive_summary = generate_adaptive_executive_summary(data, schema, view_title)
         
-        response = chatbot.get_response(question, view_title, data, executive_summary)
-        st.session_state[chat_key].append({"question": question, "answer": response})
-        st.rerun()
+        st.markdown(f"**You:** {question}")
+        response = st.write_stream(chatbot.stream_response(question, view_title, data, executive_summary))
+        st.session_state[chat_key].append({"question": question, "answer": response.strip()})
+        st.rerun(scope="fragment")
     
     # Regular chat input
     question = st.text_input("Ask a question about this data:", key=f"question_{view_title}")
     
     if st.button("Send", key=f"send_{view_title}") and question:
-        # Generate dynamic executive summary for this data
         executive_summary = generate_adaptive_executive_summary(data, schema, view_title)
         
-        response = chatbot.get_response(question, view_title, data, executive_summary)
-        st.session_state[chat_key].append({"question": question, "answer": response})
-        st.rerun()
+        st.markdown(f"**You:** {question}")
+        response = st.write_stream(chatbot.stream_response(question, view_title, data, executive_summary))
+        st.session_state[chat_key].append({"question": question, "answer": response.strip()})
+        st.rerun(scope="fragment")
     
     # Display chat history
     if st.session_state[chat_key]:
         st.markdown("---")
         st.subheader("💬 Conversation")
         
-        for i, chat in enumerate(reversed(st.session_state[chat_key][-3:])):
+        # Newest three exchanges, read once from the tail of the deque
+        recent = list(itertools.islice(reversed(st.session_state[chat_key]), 3))
+        last_idx = len(recent) - 1
+        for i, chat in enumerate(recent):
             with st.container():
                 st.markdown(f"**You:** {chat['question']}")
                 st.markdown(f"**AI:** {chat['answer']}")
-                if i < len(st.session_state[chat_key][-3:]) - 1:
+                if i < last_idx:
                     st.markdown("---")
 
 def generate_schema_based_suggestions(metrics, analysis_type):
@@ -3409,6 +3742,120 @@ def generate_schema_based_suggestions(metrics, analysis_type):
     
     return suggestions[:4]
 
+# Prompt modules for the legacy summary generator. Static instructions come
+# first and the data block last, so every request of a given analysis type
+# shares the same cacheable prefix.
+EXECUTIVE_SUMMARY_SYSTEM_ROLE = "You are a world-class financial analyst and business intelligence expert with 15+ years of experience in revenue operations, customer analytics, and strategic business planning. Provide actionable insights with specific metrics and recommendations."
+SUMMARY_OUTPUT_FORMAT = "Create a professional executive summary with:"
+DATA_CONTEXT_BLOCK = Template("Data Context:\n$data_context")
+
+def _summary_section(title, *bullets):
+    """Render one markdown section of a summary prompt"""
+    return "\n".join([f"## {title}", *(f"- {bullet}" for bullet in bullets)])
+
+LEGACY_SUMMARY_INTROS = {
+    "quarterly": "You are analyzing Q3 to Q4 quarterly revenue performance data. This dataset contains customer-level revenue data showing Quarter 3 Revenue, Quarter 4 Revenue, Variance (absolute change), and Percentage of Variance (growth rate).",
+    "bridge": "You are a revenue operations expert. Analyze this revenue bridge data showing customer expansion, contraction, and churn patterns.",
+    "geographic": "You are a market expansion strategist. Analyze this geographic revenue distribution data across countries and regions.",
+    "customer": "You are a customer portfolio analyst. Analyze this customer concentration and portfolio data.",
+    "monthly": "You are a business intelligence analyst. Analyze this monthly revenue trend and seasonality data."
+}
+
+LEGACY_SUMMARY_SECTIONS = {
+    "quarterly": (
+        _summary_section("📈 Key Performance Insights",
+                         "Identify top 3 critical findings from customer revenue analysis with specific metrics",
+                         "Calculate total revenue growth between Q3 and Q4 using actual numbers",
+                         "Analyze customer segmentation by growth performance (high performers vs. declining customers)"),
+        _summary_section("🎯 Growth Analysis & Trends",
+                         "Highlight best performing customers with exact growth percentages and revenue figures",
+                         "Identify customers with highest absolute revenue gains",
+                         "Assess overall portfolio momentum and growth distribution patterns"),
+        _summary_section("⚠️ Risk Assessment & Challenges",
+                         "Flag customers with significant revenue decline or negative variance",
+                         "Identify volatility patterns and potential retention risks",
+                         "Assess revenue concentration and customer dependency risks"),
+        _summary_section("🚀 Strategic Recommendations",
+                         "Prioritize customer expansion opportunities based on growth trends",
+                         "Suggest retention strategies for declining accounts",
+                         "Recommend revenue optimization tactics based on variance analysis")
+    ),
+    "bridge": (
+        _summary_section("Key Insights",
+                         "Revenue retention and expansion patterns",
+                         "Customer behavior analysis (expansion vs churn)",
+                         "Net revenue retention indicators"),
+        _summary_section("Performance Highlights",
+                         "Top expanding customers and revenue amounts",
+                         "Healthy expansion revenue patterns",
+                         "Customer growth momentum"),
+        _summary_section("Risk Factors",
+                         "Churn patterns and at-risk customers",
+                         "Revenue contraction concerns"),
+        _summary_section("Strategic Recommendations",
+                         "Customer success and retention strategies",
+                         "Expansion revenue optimization opportunities")
+    ),
+    "geographic": (
+        _summary_section("Key Insights",
+                         "Revenue concentration by geography",
+                         "Top performing markets with specific revenue amounts",
+                         "Market penetration patterns"),
+        _summary_section("Performance Highlights",
+                         "Strongest revenue markets and growth opportunities",
+                         "Geographic diversification status",
+                         "International market performance"),
+        _summary_section("Risk Factors",
+                         "Geographic concentration risks",
+                         "Underperforming markets"),
+        _summary_section("Strategic Recommendations",
+                         "Market expansion priorities",
+                         "Geographic diversification strategies")
+    ),
+    "customer": (
+        _summary_section("Key Insights",
+                         "Customer concentration risk assessment",
+                         "Portfolio diversification analysis",
+                         "Key customer dependencies"),
+        _summary_section("Performance Highlights",
+                         "Top revenue contributors",
+                         "Customer segment performance",
+                         "Portfolio health indicators"),
+        _summary_section("Risk Factors",
+                         "Concentration risks and dependencies",
+                         "Customer portfolio vulnerabilities"),
+        _summary_section("Strategic Recommendations",
+                         "Portfolio optimization strategies",
+                         "Customer diversification opportunities")
+    ),
+    "monthly": (
+        _summary_section("Key Insights",
+                         "Monthly growth patterns and trends",
+                         "Seasonal variations and consistency",
+                         "Revenue momentum analysis"),
+        _summary_section("Performance Highlights",
+                         "Best performing months and growth rates",
+                         "Trend consistency and predictability",
+                         "Revenue acceleration patterns"),
+        _summary_section("Risk Factors",
+                         "Volatility concerns and declining trends",
+                         "Seasonal risks"),
+        _summary_section("Strategic Recommendations",
+                         "Growth forecasting and planning insights",
+                         "Seasonal optimization strategies")
+    )
+}
+
+# Static prompt prefix per analysis type; only the data block is appended per call
+LEGACY_SUMMARY_PROMPTS = {
+    kind: "\n\n".join([
+        LEGACY_SUMMARY_INTROS[kind],
+        "Provide a comprehensive executive summary analyzing customer growth patterns, revenue variance, and business performance:" if kind == "quarterly" else SUMMARY_OUTPUT_FORMAT,
+        *sections
+    ])
+    for kind, sections in LEGACY_SUMMARY_SECTIONS.items()
+}
+
 def generate_ai_executive_summary_old(json_data, analysis_type):
     """Legacy function for generating executive summaries"""
     # Initialize OpenAI client
@@ -3421,144 +3868,15 @@ def generate_ai_executive_summary_old(json_data, analysis_type):
         
         # Prepare data context (limit size for API)
         data_sample = json_data[:50] if isinstance(json_data, list) and len(json_data) > 50 else json_data
-        data_context = json.dumps(data_sample, indent=2, default=str)[:8000]  # Limit context size
-        
-        # Create analysis-specific prompts
-        prompts = {
-            "quarterly": f"""You are analyzing Q3 to Q4 quarterly revenue performance data. This dataset contains customer-level revenue data showing Quarter 3 Revenue, Quarter 4 Revenue, Variance (absolute change), and Percentage of Variance (growth rate).
-
-Data Context:
-{data_context}
-
-Provide a comprehensive executive summary analyzing customer growth patterns, revenue variance, and business performance:
-
-## 📈 Key Performance Insights
-- Identify top 3 critical findings from customer revenue analysis with specific metrics
-- Calculate total revenue growth between Q3 and Q4 using actual numbers
-- Analyze customer segmentation by growth performance (high performers vs. declining customers)
-
-## 🎯 Growth Analysis & Trends  
-- Highlight best performing customers with exact growth percentages and revenue figures
-- Identify customers with highest absolute revenue gains
-- Assess overall portfolio momentum and growth distribution patterns
-
-## ⚠️ Risk Assessment & Challenges
-- Flag customers with significant revenue decline or negative variance
-- Identify volatility patterns and potential retention risks
-- Assess revenue concentration and customer dependency risks
-
-## 🚀 Strategic Recommendations
-- Prioritize customer expansion opportunities based on growth trends
-- Suggest retention strategies for declining accounts
-- Recommend revenue optimization tactics based on variance analysis""",
-
-            "bridge": f"""You are a revenue operations expert. Analyze this revenue bridge data showing customer expansion, contraction, and churn patterns.
-
-Data Context:
-{data_context}
-
-Create a professional executive summary with:
-
-## Key Insights
-- Revenue retention and expansion patterns
-- Customer behavior analysis (expansion vs churn)
-- Net revenue retention indicators
-
-## Performance Highlights
-- Top expanding customers and revenue amounts
-- Healthy expansion revenue patterns
-- Customer growth momentum
-
-## Risk Factors
-- Churn patterns and at-risk customers
-- Revenue contraction concerns
-
-## Strategic Recommendations
-- Customer success and retention strategies
-- Expansion revenue optimization opportunities""",
-
-            "geographic": f"""You are a market expansion strategist. Analyze this geographic revenue distribution data across countries and regions.
-
-Data Context:
-{data_context}
-
-Create a professional executive summary with:
-
-## Key Insights
-- Revenue concentration by geography
-- Top performing markets with specific revenue amounts
-- Market penetration patterns
-
-## Performance Highlights
-- Strongest revenue markets and growth opportunities
-- Geographic diversification status
-- International market performance
-
-## Risk Factors
-- Geographic concentration risks
-- Underperforming markets
-
-## Strategic Recommendations
-- Market expansion priorities
-- Geographic diversification strategies""",
-
-            "customer": f"""You are a customer portfolio analyst. Analyze this customer concentration and portfolio data.
-
-Data Context:
-{data_context}
-
-Create a professional executive summary with:
-
-## Key Insights
-- Customer concentration risk assessment
-- Portfolio diversification analysis
-- Key customer dependencies
-
-## Performance Highlights
-- Top revenue contributors
-- Customer segment performance
-- Portfolio health indicators
-
-## Risk Factors
-- Concentration risks and dependencies
-- Customer portfolio vulnerabilities
-
-## Strategic Recommendations
-- Portfolio optimization strategies
-- Customer diversification opportunities""",
-
-            "monthly": f"""You are a business intelligence analyst. Analyze this monthly revenue trend and seasonality data.
-
-Data Context:
-{data_context}
-
-Create a professional executive summary with:
-
-## Key Insights
-- Monthly growth patterns and trends
-- Seasonal variations and consistency
-- Revenue momentum analysis
-
-## Performance Highlights
-- Best performing months and growth rates
-- Trend consistency and predictability
-- Revenue acceleration patterns
-
-## Risk Factors
-- Volatility concerns and declining trends
-- Seasonal risks
-
-## Strategic Recommendations
-- Growth forecasting and planning insights
-- Seasonal optimization strategies"""
-        }
+        data_context = _bounded_dumps(data_sample, 8000)  # Limit context size
         
-        prompt = prompts.get(analysis_type, f"Analyze this {analysis_type} data and provide business insights.")
+        prompt_prefix = LEGACY_SUMMARY_PROMPTS.get(analysis_type, f"Analyze this {analysis_type} data and provide business insights.")
+        prompt = "\n\n".join([prompt_prefix, DATA_CONTEXT_BLOCK.substitute(data_context=data_context)])
         
         response = client.chat.completions.create(
             model="gpt-4",
             messages=[
-                {"role": "system", "content": "You are a world-class financial analyst and business intelligence expert with 15+ years of experience in revenue operations, customer analytics, and strategic business planning. Provide actionable insights with specific metrics and recommendations."},
+                {"role": "system", "content": EXECUTIVE_SUMMARY_SYSTEM_ROLE},
                 {"role": "user", "content": prompt}
             ],
             max_tokens=1500,
@@ -3572,21 +3890,24 @@ Create a professional executive summary with:
 
 def generate_fallback_summary(json_data, analysis_type):
     """Fallback summary generation when AI is not available"""
+    # Only these summaries read columns; every other type just counts records
+    if analysis_type in ("quarterly", "bridge", "geographic"):
+        df = pd.DataFrame(json_data) if isinstance(json_data, list) and json_data else pd.DataFrame()
     
     if analysis_type == "quarterly":
-        if not json_data:
+        if df.empty:
             return "No quarterly data available for analysis."
             
-        total_customers = len(json_data)
-        positive_growth = len([c for c in json_data if c.get('Percentage of Variance', 0) and c['Percentage of Variance'] > 0])
-        top_performers = sorted([c for c in json_data if c.get('Percentage of Variance') is not None], 
-                               key=lambda x: x.get('Percentage of Variance', 0), reverse=True)[:3]
+        total_customers = len(df)
+        variance = _numeric_column(df, 'Percentage of Variance')
+        positive_growth = int((variance > 0).sum())
+        top_performers = variance.nlargest(3)
         
         # Calculate percentage
         growth_percentage = (positive_growth/total_customers*100) if total_customers > 0 else 0
-        top_performer_growth = top_performers[0].get('Percentage of Variance', 0) if top_performers else 0
+        top_performer_growth = top_performers.iloc[0] if not top_performers.empty else 0
         
-        top_performer_name = top_performers[0]['Customer Name'] if top_performers else 'N/A'
+        top_performer_name = df.at[top_performers.index[0], 'Customer Name'] if not top_performers.empty else 'N/A'
         
         # Pre-calculate formatted strings to avoid f-string syntax issues
         growth_percentage_str = f"{growth_percentage:.1f}%"
@@ -3608,12 +3929,13 @@ def generate_fallback_summary(json_data, analysis_type):
         return summary.strip()
     
     elif analysis_type == "bridge":
-        if not json_data:
+        if df.empty:
             return "No revenue bridge data available for analysis."
             
-        total_customers = len(json_data)
-        expansion_customers = len([c for c in json_data if c.get('Expansion Revenue', 0) > 0])
-        total_expansion = sum(c.get('Expansion Revenue', 0) for c in json_data)
+        total_customers = len(df)
+        expansion = _numeric_column(df, 'Expansion Revenue')
+        expansion_customers = int((expansion > 0).sum())
+        total_expansion = expansion.sum()
         
         # Pre-calculate expansion percentage and revenue to avoid f-string syntax issues
         expansion_pct = (expansion_customers/total_customers*100) if total_customers > 0 else 0
@@ -3637,18 +3959,19 @@ def generate_fallback_summary(json_data, analysis_type):
         return summary.strip()
     
     elif analysis_type == "geographic":
-        if not json_data:
+        if df.empty:
             return "No geographic data available for analysis."
             
-        total_countries = len(json_data)
-        total_revenue = sum(c.get('Yearly Revenue', 0) for c in json_data)
-        top_countries = sorted(json_data, key=lambda x: x.get('Yearly Revenue', 0), reverse=True)[:5]
+        total_countries = len(df)
+        revenue = _numeric_column(df, 'Yearly Revenue')
+        total_revenue = revenue.sum()
+        top_market = revenue.nlargest(1)
         
         # Pre-calculate formatted revenue strings to avoid f-string syntax issues
         total_revenue_str = f"${total_revenue:,.2f}"
-        top_market_revenue = top_countries[0].get('Yearly Revenue', 0) if top_countries else 0
+        top_market_revenue = top_market.iloc[0] if not top_market.empty else 0
         top_market_revenue_str = f"${top_market_revenue:,.2f}"
-        top_market_name = top_countries[0]['Country'] if top_countries else 'N/A'
+        top_market_name = df.at[top_market.index[0], 'Country'] if not top_market.empty else 'N/A'
         
         summary = f"""
         ## Key Insights
@@ -3705,25 +4028,11 @@ def show_processing_animation():
     status_text.text("✅ Analysis complete!")
     time.sleep(1)
 
-class OpenAIChatbot:
-    def __init__(self):
-        self.api_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("openai_api_key", "")
-        if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
-        else:
-            self.client = None
-    
-    def get_response(self, user_question, tab_type, json_data, executive_summary):
-        """Get context-aware response from OpenAI based on tab and full JSON data"""
-        if not self.client:
-            return "⚠️ OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
-        
-        # Create context-specific prompts for each tab with full JSON data
-        context_prompts = {
-            "quarterly": f"""You are a world-class financial analyst specializing in quarterly revenue performance and growth analysis with deep expertise in SaaS metrics and customer growth patterns.
+# Tab-specific chatbot instructions. They hold nothing per-dataset, so the request prefix stays identical
+# for every question on a tab and OpenAI's prompt cache can reuse it
+CHATBOT_CONTEXT_PROMPTS = {
+    "quarterly": """You are a world-class financial analyst specializing in quarterly revenue performance and growth analysis with deep expertise in SaaS metrics and customer growth patterns.
 
-            Executive Summary: {executive_summary}
-            
             ANALYSIS FOCUS: Provide detailed analysis covering:
             • Customer-specific performance metrics and growth trajectories
             • Quarter-over-quarter growth patterns and variance analysis  
@@ -3741,11 +4050,9 @@ class OpenAIChatbot:
             • Provide data-driven recommendations with supporting numbers
             • Use the format: "Customer X shows Y% growth ($Z revenue)" for specificity
             • Never make general statements without specific data backing.""",
-            
-            "bridge": f"""You are a senior revenue operations expert specializing in revenue bridge analysis, customer lifecycle management, and churn dynamics with extensive experience in subscription business models.
 
-            Executive Summary: {executive_summary}
-            
+    "bridge": """You are a senior revenue operations expert specializing in revenue bridge analysis, customer lifecycle management, and churn dynamics with extensive experience in subscription business models.
+
             ANALYSIS FOCUS: Provide comprehensive analysis covering:
             • Revenue bridge component analysis (expansion, contraction, churn, new)
             • Customer retention patterns and at-risk account identification
@@ -3762,11 +4069,9 @@ class OpenAIChatbot:
             • Calculate and state net revenue retention with supporting data
             • Identify at-risk customers with specific revenue impact numbers
             • Provide retention strategies based on actual customer patterns from the data.""",
-            
-            "geographic": f"""You are an expert market expansion strategist and international business development specialist with deep knowledge of global revenue optimization and geographic market analysis.
 
-            Executive Summary: {executive_summary}
-            
+    "geographic": """You are an expert market expansion strategist and international business development specialist with deep knowledge of global revenue optimization and geographic market analysis.
+
             ANALYSIS FOCUS: Provide strategic analysis covering:
             • Country-wise revenue performance and market penetration
             • Geographic diversification assessment and concentration risks
@@ -3783,11 +4088,9 @@ class OpenAIChatbot:
             • Rank countries by revenue performance with actual dollar amounts
             • Identify expansion opportunities with supporting revenue data
             • Reference specific countries and their contribution percentages.""",
-            
-            "customer": f"""You are a strategic customer success executive and portfolio risk analyst with extensive experience in customer concentration management, account strategy, and revenue diversification.
 
-            Executive Summary: {executive_summary}
-            
+    "customer": """You are a strategic customer success executive and portfolio risk analyst with extensive experience in customer concentration management, account strategy, and revenue diversification.
+
             ANALYSIS FOCUS: Provide comprehensive analysis covering:
             • Customer concentration risk assessment and portfolio diversification
             • Individual customer performance metrics and revenue contribution analysis
@@ -3804,11 +4107,9 @@ class OpenAIChatbot:
             • Identify top revenue contributors with dollar amounts and percentages
             • Assess customer diversification using actual portfolio numbers
             • Recommend account strategies based on specific customer performance data.""",
-            
-            "monthly": f"""You are a senior business intelligence analyst and revenue forecasting expert specializing in time-series analysis, seasonal business patterns, and monthly performance optimization.
 
-            Executive Summary: {executive_summary}
-            
+    "monthly": """You are a senior business intelligence analyst and revenue forecasting expert specializing in time-series analysis, seasonal business patterns, and monthly performance optimization.
+
             ANALYSIS FOCUS: Provide comprehensive analysis covering:
             • Month-over-month revenue trend analysis and pattern recognition
             • Seasonal variation identification and business cycle assessment
@@ -3825,31 +4126,10 @@ class OpenAIChatbot:
             • Identify seasonal patterns with specific revenue data points
             • Cite highest/lowest performing months with actual dollar amounts
             • Provide forecasting insights based on historical data trends from the dataset."""
-        }
-        
-        system_prompt = context_prompts.get(tab_type, "You are a financial analyst helping with investment analysis.")
-        
-        # Include comprehensive data context for better analysis
-        if isinstance(json_data, list):
-            # For list data, include more samples and summary statistics
-            sample_data = json_data[:10]  # Increased from 5 to 10 samples
-            total_records = len(json_data)
-            data_summary = f"DATASET OVERVIEW: Total records: {total_records}\n"
-            
-            # Add column information if available
-            if json_data:
-                columns = list(json_data[0].keys()) if isinstance(json_data[0], dict) else []
-                data_summary += f"Available columns: {', '.join(columns)}\n"
-            
-            data_context = f"{data_summary}\nSAMPLE DATA (First 10 records):\n{json.dumps(sample_data, indent=2)[:3000]}..."
-        else:
-            data_context = f"COMPLETE DATASET:\n{json.dumps(json_data, indent=2)[:3000]}..."
-        
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": """You are a world-class senior investment analyst and revenue operations expert with 15+ years of experience in financial metrics, customer segmentation, and business intelligence. 
+}
+CHATBOT_DEFAULT_PROMPT = "You are a financial analyst helping with investment analysis."
+
+CHATBOT_ANALYST_SYSTEM_PROMPT = """You are a world-class senior investment analyst and revenue operations expert with 15+ years of experience in financial metrics, customer segmentation, and business intelligence. 
 
 CRITICAL DATA ADHERENCE RULES:
 - ONLY use information from the provided dataset - DO NOT add external information or assumptions
@@ -3870,44 +4150,126 @@ RESPONSE FORMAT REQUIREMENTS:
 EXAMPLE RESPONSE STRUCTURE:
 "Based on the provided data, [specific customer/metric observation]. Key findings include: • [Specific data point with numbers] • [Another specific metric with customer names] • [Concrete recommendation based on data patterns]"
 
-DO NOT provide vague or generic responses. Every statement must be backed by specific data from the provided dataset."""},
+DO NOT provide vague or generic responses. Every statement must be backed by specific data from the provided dataset."""
+
+class OpenAIChatbot:
+    def __init__(self):
+        self.api_key = os.getenv("OPENAI_API_KEY") or st.secrets.get("openai_api_key", "")
+        if self.api_key:
+            self.client = OpenAI(api_key=self.api_key)
+        else:
+            self.client = None
+    
+    def get_response(self, user_question, tab_type, json_data, executive_summary):
+        """Get context-aware response from OpenAI based on tab and full JSON data"""
+        return "".join(self.stream_response(user_question, tab_type, json_data, executive_summary)).strip()
+    
+    def stream_response(self, user_question, tab_type, json_data, executive_summary):
+        """Yield the response text in chunks as OpenAI generates it"""
+        if not self.client:
+            yield "⚠️ OpenAI API key not configured. Please set OPENAI_API_KEY environment variable."
+            return
+        
+        # Create the context-specific prompt for this tab
+        system_prompt = CHATBOT_CONTEXT_PROMPTS.get(tab_type, CHATBOT_DEFAULT_PROMPT)
+        
+        # Include comprehensive data context for better analysis
+        if isinstance(json_data, list) and len(json_data) > CHAT_SUMMARY_CONTEXT_MIN_ROWS and isinstance(json_data[0], dict):
+            # Large tables: column statistics carry more signal than a truncated JSON dump
+            data_context = get_chat_data_context(tab_type, json_data)
+        elif isinstance(json_data, list):
+            # For list data, include more samples and summary statistics
+            sample_data = json_data[:10]  # Increased from 5 to 10 samples
+            total_records = len(json_data)
+            data_summary = f"DATASET OVERVIEW: Total records: {total_records}\n"
+            
+            # Add column information if available
+            if json_data:
+                columns = list(json_data[0].keys()) if isinstance(json_data[0], dict) else []
+                data_summary += f"Available columns: {', '.join(columns)}\n"
+            
+            data_context = f"{data_summary}\nSAMPLE DATA (First 10 records):\n{_bounded_dumps(sample_data, 3000)}..."
+        else:
+            data_context = f"COMPLETE DATASET:\n{_bounded_dumps(json_data, 3000)}..."
+        
+        try:
+            response = self.client.chat.completions.create(
+                model="gpt-4o",
+                messages=[
+                    # Static instructions first so repeated questions share a cacheable prefix
+                    {"role": "system", "content": CHATBOT_ANALYST_SYSTEM_PROMPT},
                     {"role": "system", "content": system_prompt},
                     {"role": "system", "content": data_context},
+                    {"role": "system", "content": f"Executive Summary: {executive_summary}"},
                     {"role": "user", "content": user_question}
                 ],
                 max_tokens=3000,
-                temperature=0.4
+                temperature=0.4,
+                stream=True,
+                extra_body={"prompt_cache_key": f"{tab_type}-v1"}
             )
-            return response.choices[0].message.content.strip()
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
         except Exception as e:
-            return f"⚠️ Error getting response: {str(e)}"
+            yield f"⚠️ Error getting response: {str(e)}"
 
-def create_beautiful_tab_layout(tab_name, json_data, tab_type):
+# Above this many rows the chatbot gets column statistics instead of raw records
+CHAT_SUMMARY_CONTEXT_MIN_ROWS = 100
+
+def get_chat_data_context(tab_type, json_data):
+    """Summarize a large tab as column statistics plus sample rows, cached per dataset"""
+    # One entry per tab type; holding the data itself means a reloaded dataset is never mistaken for it
+    ctx_cache = st.session_state.setdefault('_ctx_cache', {})
+    cached = ctx_cache.get(tab_type)
+    if cached is not None and cached[0] is json_data:
+        return cached[1]
+    
+    try:
+        df = pd.DataFrame(json_data)
+        context = (
+            f"DATASET OVERVIEW: Total records: {len(df)}\n"
+            f"Available columns: {', '.join(map(str, df.columns))}\n\n"
+            f"COLUMN STATISTICS:\n{df.describe(include='all').to_string()}\n\n"
+            f"SAMPLE DATA (First 10 records):\n{df.head(10).to_json(orient='records')}"
+        )
+    except Exception:
+        context = f"SAMPLE DATA (First 10 records):\n{_bounded_dumps(json_data[:10], 3000)}..."
+    ctx_cache[tab_type] = (json_data, context)
+    return context
+
+# Per tab type: display function, tab label, plain title and view title (which also keys the tab's chat state)
+TAB_DISPATCH = {
+    "quarterly": {"display": display_quarterly_analysis, "label": "📊 Quarterly Revenue",
+                  "title": "Quarterly Revenue", "view_title": "Quarterly Revenue"},
+    "bridge": {"display": display_churn_analysis, "label": "🌉 Revenue Bridge",
+               "title": "Revenue Bridge", "view_title": "Revenue Bridge"},
+    "geographic": {"display": display_country_analysis, "label": "🌍 Geographic Analysis",
+                   "title": "Geographic Analysis", "view_title": "Country Analysis"},
+    "customer": {"display": display_customer_concentration_analysis, "label": "👥 Customer Analysis",
+                 "title": "Customer Analysis", "view_title": "Customer Concentration"},
+    "monthly": {"display": display_month_on_month_analysis, "label": "📈 Monthly Trends",
+                "title": "Monthly Trends", "view_title": "Monthly Analysis"},
+    "general": {"display": None, "label": "📋 General Analysis",
+                "title": "General Analysis", "view_title": "General Analysis"},
+}
+
+def create_beautiful_tab_layout(tab_name, json_data, tab_type, executive_summary=None):
     """Create beautiful layout for each analysis tab with enhanced display functions"""
     
     # Convert JSON to DataFrame for the display functions
-    df = pd.DataFrame(json_data) if json_data else pd.DataFrame()
+    df = _downcast_int_columns(records_to_dataframe(json_data)) if json_data else pd.DataFrame()
     
     # Generate AI-powered executive summary first (with schema if available)
     schema_analyzer = JSONSchemaAnalyzer()
     schema = schema_analyzer.analyze_json_schema(json_data, tab_type)
-    executive_summary = generate_ai_executive_summary(json_data, tab_type, schema)
+    if executive_summary is None:
+        executive_summary = generate_ai_executive_summary(json_data, tab_type, schema)
     
     # Call appropriate display function based on tab type
-    if tab_type == "quarterly" and not df.empty:
-        display_quarterly_analysis(df, json_data, "Quarterly Revenue")
-        
-    elif tab_type == "bridge" and not df.empty:
-        display_churn_analysis(df, json_data, "Revenue Bridge")
-        
-    elif tab_type == "geographic" and not df.empty:
-        display_country_analysis(df, json_data, "Country Analysis")
-        
-    elif tab_type == "customer" and not df.empty:
-        display_customer_concentration_analysis(df, json_data, "Customer Concentration")
-        
-    elif tab_type == "monthly" and not df.empty:
-        display_month_on_month_analysis(df, json_data, "Monthly Analysis")
+    tab_entry = TAB_DISPATCH.get(tab_type)
+    if tab_entry and tab_entry["display"] is not None and not df.empty:
+        tab_entry["display"](df, json_data, tab_entry["view_title"])
         
     else:
         # Fallback for empty data
@@ -3919,8 +4281,49 @@ def create_beautiful_tab_layout(tab_name, json_data, tab_type):
         with st.expander("📋 Executive Summary", expanded=True):
             st.markdown(executive_summary if executive_summary else "No summary available.")
 
+# Figure factories for the legacy layout; cached so reruns with unchanged data skip the rebuild
+@st.cache_data(ttl=600, show_spinner=False)
+def _legacy_bridge_waterfall(categories, values):
+    """Build the quarter-over-quarter revenue bridge waterfall"""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Waterfall(
+        name="Revenue Bridge",
+        orientation="v",
+        measure=["absolute", "relative", "relative", "relative", "relative", "total"],
+        x=list(categories),
+        text=[f"${v:,.0f}" for v in values],
+        y=list(values),
+        connector={"line": {"color": "rgb(63, 63, 63)"}},
+    ))
+    
+    fig.update_layout(title="Revenue Bridge: Quarter 3 to Quarter 4", showlegend=False, height=400)
+    return fig
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _legacy_country_pie(countries, revenues):
+    """Build the top-10 countries revenue share pie"""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Pie(labels=list(countries), values=list(revenues)))
+    fig.update_layout(title="🌍 Top 10 Countries by Revenue")
+    return fig
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _legacy_country_bar(countries, revenues):
+    """Build the top-10 countries revenue bar chart"""
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Bar(
+        x=list(countries),
+        y=list(revenues),
+        marker=dict(color=list(revenues), colorscale='Blues', showscale=True,
+                    colorbar=dict(title='Yearly Revenue')),
+    ))
+    fig.update_layout(title="📈 Revenue by Country (Top 10)", xaxis_title='Country',
+                      yaxis_title='Yearly Revenue', xaxis_tickangle=-45)
+    return fig
+
 def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
     """Create beautiful layout for each analysis tab with charts and chatbot using real JSON data"""
+    import plotly.express as px
     
     # Add custom CSS for better styling
     st.markdown("""
@@ -3953,6 +4356,9 @@ def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
     # Generate AI-powered executive summary
     executive_summary = generate_ai_executive_summary(json_data, tab_type)
     
+    # Build the DataFrame once for every branch below
+    df = records_to_dataframe(json_data) if json_data else pd.DataFrame()
+    
     # Header
     st.header(f"📊 {tab_name}")
     
@@ -3961,9 +4367,10 @@ def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
         st.markdown("### 🎯 Key Metrics")
         
         # Calculate metrics from real data
-        total_customers = len(json_data)
-        positive_growth = len([c for c in json_data if c.get('Percentage of Variance', 0) and c['Percentage of Variance'] > 0])
-        avg_growth = sum(c.get('Percentage of Variance', 0) for c in json_data if c.get('Percentage of Variance') is not None) / max(1, len([c for c in json_data if c.get('Percentage of Variance') is not None]))
+        variance = _numeric_column(df, 'Percentage of Variance')
+        total_customers = len(df)
+        positive_growth = int((variance > 0).sum())
+        avg_growth = float(variance.mean()) if variance.notna().any() else 0.0
         
         col1, col2, col3, col4 = st.columns(4)
         with col1:
@@ -3977,8 +4384,7 @@ def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
             st.metric("Growth Rate", f"{growth_rate:.1f}%")
         
         # Top performers chart
-        df = pd.DataFrame(json_data)
-        top_performers = df.nlargest(10, 'Percentage of Variance')
+        top_performers = _top_k_rows(df, 'Percentage of Variance', 10)
         if not top_performers.empty:
             fig = px.bar(top_performers, x='Customer Name', y='Percentage of Variance',
                         title="📈 Top 10 Customer Growth Performers (Q3 to Q4)",
@@ -3989,50 +4395,31 @@ def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
     elif tab_type == "bridge" and json_data:
         st.header("🔄 Revenue Bridge & Churn Analysis")
         
-        # Convert to DataFrame for easier manipulation
-        df = pd.DataFrame(json_data)
+        # Handle different possible column names and reduce all bridge components at once
+        q3_total, new_total, expansion_total, contraction_total, churned_total, q4_total = _column_totals(
+            df, _resolve_bridge_columns(df)
+        )
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            total_churned = df['Churned Revenue'].sum() if 'Churned Revenue' in df.columns else 0
-            st.metric("Total Churned Revenue", f"${total_churned:,.2f}")
+            st.metric("Total Churned Revenue", f"${churned_total:,.2f}")
             
         with col2:
-            total_new = df['New Revenue'].sum() if 'New Revenue' in df.columns else 0
-            st.metric("Total New Revenue", f"${total_new:,.2f}")
+            st.metric("Total New Revenue", f"${new_total:,.2f}")
             
         with col3:
-            total_expansion = df['Expansion Revenue'].sum() if 'Expansion Revenue' in df.columns else 0
-            st.metric("Total Expansion Revenue", f"${total_expansion:,.2f}")
+            st.metric("Total Expansion Revenue", f"${expansion_total:,.2f}")
         
         # Revenue bridge waterfall chart
         st.subheader("Revenue Bridge Analysis")
         
-        # Handle different possible column names and calculate totals
-        q3_total = df['Quarter 3 Revenue'].sum() if 'Quarter 3 Revenue' in df.columns else (df['Q3 Revenue'].sum() if 'Q3 Revenue' in df.columns else 0)
-        q4_total = df['Quarter 4 Revenue'].sum() if 'Quarter 4 Revenue' in df.columns else (df['Q4 Revenue'].sum() if 'Q4 Revenue' in df.columns else 0)
-        new_total = df['New Revenue'].sum() if 'New Revenue' in df.columns else 0
-        expansion_total = df['Expansion Revenue'].sum() if 'Expansion Revenue' in df.columns else 0
-        contraction_total = df['Contraction Revenue'].sum() if 'Contraction Revenue' in df.columns else 0
-        churned_total = df['Churned Revenue'].sum() if 'Churned Revenue' in df.columns else 0
-        
         revenue_categories = ['Starting Revenue', 'New Revenue', 'Expansion Revenue', 
                              'Contraction Revenue', 'Churned Revenue', 'Ending Revenue']
         
         values = [q3_total, new_total, expansion_total, -contraction_total, -churned_total, q4_total]
         
-        fig = go.Figure(go.Waterfall(
-            name="Revenue Bridge",
-            orientation="v",
-            measure=["absolute", "relative", "relative", "relative", "relative", "total"],
-            x=revenue_categories,
-            text=[f"${v:,.0f}" for v in values],
-            y=values,
-            connector={"line": {"color": "rgb(63, 63, 63)"}},
-        ))
-        
-        fig.update_layout(title="Revenue Bridge: Quarter 3 to Quarter 4", showlegend=False, height=400)
+        fig = _legacy_bridge_waterfall(tuple(revenue_categories), tuple(float(v) for v in values))
         st.plotly_chart(fig, use_container_width=True)
         
         # Detailed table
@@ -4058,21 +4445,18 @@ def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
             st.metric("Top Revenue", f"${top_country.get('Yearly Revenue', 0):,.0f}")
         
         # Geographic charts
-        df = pd.DataFrame(json_data)
         col1, col2 = st.columns(2)
         
+        # One plain payload backs both charts
+        payload = _top_k_rows(df, 'Yearly Revenue', 10)[['Country', 'Yearly Revenue']].to_dict(orient='list')
+        countries = tuple(payload['Country'])
+        revenues = tuple(map(float, payload['Yearly Revenue']))
+        
         with col1:
-            top_10 = df.nlargest(10, 'Yearly Revenue')
-            fig = px.pie(top_10, values='Yearly Revenue', names='Country',
-                       title="🌍 Top 10 Countries by Revenue")
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(_legacy_country_pie(countries, revenues), use_container_width=True)
         
         with col2:
-            fig = px.bar(top_10, x='Country', y='Yearly Revenue',
-                       title="📈 Revenue by Country (Top 10)",
-                       color='Yearly Revenue', color_continuous_scale='Blues')
-            fig.update_layout(xaxis_tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(_legacy_country_bar(countries, revenues), use_container_width=True)
     
     elif tab_type == "customer" and json_data:
         st.markdown("### 🎯 Key Metrics")
@@ -4116,14 +4500,18 @@ def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
     st.markdown("### 💬 AI Data Analyst")
     st.markdown("Ask questions about the data, trends, insights, or get analysis recommendations.")
     
+    _chat_ui(tab_name, tab_type, json_data, executive_summary)
+
+@st.fragment
+def _chat_ui(tab_name, tab_type, json_data, executive_summary):
+    """Chat section of the legacy layout; runs as a fragment so messages don't redraw the charts"""
     # Initialize chatbot
     if f"chatbot_{tab_type}" not in st.session_state:
         st.session_state[f"chatbot_{tab_type}"] = OpenAIChatbot()
     
     # Initialize chat history for this specific tab
     chat_key = f"chat_history_{tab_type}"
-    if chat_key not in st.session_state:
-        st.session_state[chat_key] = []
+    get_chat_history(chat_key)
     
     # Quick suggestion buttons
     col1, col2, col3 = st.columns(3)
@@ -4174,6 +4562,17 @@ def create_beautiful_tab_layout_old(tab_name, json_data, tab_type):
     else:
         st.info("👋 Start a conversation by asking a question or clicking one of the suggestion buttons above!")
 
+# Categories rendered by create_beautiful_tab_layout; anything else uses the dynamic generator
+SPECIALIZED_TAB_TYPES = ("quarterly", "bridge", "geographic", "customer", "monthly")
+
+def unwrap_tab_data(data):
+    """Return (data, schema) for a tab, unwrapping the S3 metadata structure if present"""
+    if isinstance(data, list) and data and isinstance(data[0], dict) and 'data' in data[0]:
+        # S3 structure with metadata
+        return data[0]['data'], data[0].get('schema')
+    # Direct data structure
+    return data, None
+
 def show_beautiful_analysis_interface(db, company_id, company_name):
     """Show the beautiful analysis interface with 5 tabs and OpenAI chatbots"""
     
@@ -4189,7 +4588,7 @@ def show_beautiful_analysis_interface(db, company_id, company_name):
         if st.button("← Back to Portfolio"):
             # Clean up session state
             for key in list(st.session_state.keys()):
-                if key.startswith(('show_analysis', 'analyzing_company', 'analysis_complete', 'analysis_results')):
+                if key.startswith(('show_analysis', 'analyzing_company', 'analysis_complete', 'analysis_results', 'executive_summaries')):
                     del st.session_state[key]
             st.rerun()
     
@@ -4219,9 +4618,17 @@ def show_beautiful_analysis_interface(db, company_id, company_name):
             st.session_state['force_s3_refresh'] = False  # Reset flag
         analysis_results = load_dynamic_json_analyses(s3_config, use_s3, force_refresh=force_refresh)
         
+        # Request every tab's executive summary at once instead of one per tab render
+        tab_datasets = {}
+        for category, data in analysis_results.items():
+            actual_data, _ = unwrap_tab_data(data)
+            if actual_data and category in SPECIALIZED_TAB_TYPES:
+                tab_datasets[category] = actual_data
+        
         # Mark analysis as complete and store results
         st.session_state[f'analysis_complete_{company_id}'] = True
         st.session_state[f'analysis_results_{company_id}'] = analysis_results
+        st.session_state[f'executive_summaries_{company_id}'] = generate_all_executive_summaries(tab_datasets)
         st.session_state[f'use_s3_{company_id}'] = use_s3
         st.rerun()
     
@@ -4258,10 +4665,12 @@ def show_beautiful_analysis_interface(db, company_id, company_name):
                     if any(key.startswith(prefix) for prefix in [
                         f'analysis_complete_{company_id}',
                         f'analysis_results_{company_id}',
+                        f'executive_summaries_{company_id}',
                         f'use_s3_{company_id}',
                         f'chat_history_{company_id}',
                         'discovered_files',
-                        'file_cache'
+                        'file_cache',
+                        '_ctx_cache'
                     ]):
                         keys_to_remove.append(key)
                 
@@ -4273,6 +4682,7 @@ def show_beautiful_analysis_interface(db, company_id, company_name):
         else:
             if st.button("🗑️ Clear Cache"):
                 cache_manager.clear_cache()
+                st.session_state.pop('_ctx_cache', None)
                 st.success("Cache cleared!")
     
     # Create dynamic tabs based on available data
@@ -4281,25 +4691,20 @@ def show_beautiful_analysis_interface(db, company_id, company_name):
         return
     
     # Generate tab names and emojis dynamically
-    tab_config = {
-        "quarterly": "📊 Quarterly Revenue",
-        "bridge": "🌉 Revenue Bridge", 
-        "geographic": "🌍 Geographic Analysis",
-        "customer": "👥 Customer Analysis",
-        "monthly": "📈 Monthly Trends",
-        "general": "📋 General Analysis"
-    }
-    
     # Create tabs for available data
     available_categories = list(analysis_results.keys())
     tab_names = []
+    tab_titles = []
     
     for category in available_categories:
-        if category in tab_config:
-            tab_names.append(tab_config[category])
+        if category in TAB_DISPATCH:
+            tab_names.append(TAB_DISPATCH[category]["label"])
+            tab_titles.append(TAB_DISPATCH[category]["title"])
         else:
             # Dynamic naming for unknown categories
-            tab_names.append(f"📊 {category.replace('_', ' ').title()}")
+            title = category.replace('_', ' ').title()
+            tab_names.append(f"📊 {title}")
+            tab_titles.append(title)
     
     if not tab_names:
         st.error("No valid data categories found")
@@ -4310,34 +4715,28 @@ def show_beautiful_analysis_interface(db, company_id, company_name):
     
     # Initialize dynamic dashboard generator
     dashboard_generator = DynamicDashboardGenerator()
+    executive_summaries = st.session_state.get(f'executive_summaries_{company_id}', {})
     
     # Generate content for each tab dynamically
     for i, (category, data) in enumerate(analysis_results.items()):
         with tabs[i]:
             try:
-                # Extract data if it's wrapped in metadata structure
-                if isinstance(data, list) and data and isinstance(data[0], dict) and 'data' in data[0]:
-                    # S3 structure with metadata
-                    actual_data = data[0]['data']
-                    schema = data[0].get('schema')
-                else:
-                    # Direct data structure
-                    actual_data = data
-                    schema = None
+                actual_data, schema = unwrap_tab_data(data)
                 
                 # Use dynamic dashboard generator or fallback to existing layout
                 if actual_data:
-                    if category in ["quarterly", "bridge", "geographic", "customer", "monthly"]:
+                    if category in SPECIALIZED_TAB_TYPES:
                         # Use existing specialized layouts for known types
                         create_beautiful_tab_layout(
-                            tab_names[i].replace("📊 ", "").replace("🌉 ", "").replace("🌍 ", "").replace("👥 ", "").replace("📈 ", ""),
+                            tab_titles[i],
                             actual_data,
-                            category
+                            category,
+                            executive_summaries.get(category)
                         )
                     else:
                         # Use dynamic generator for new/unknown data types
                         dashboard_generator.generate_tab_layout(
-                            tab_names[i].replace("📊 ", "").replace("🌉 ", "").replace("🌍 ", "").replace("👥 ", "").replace("📈 ", ""),
+                            tab_titles[i],
                             actual_data,
                             category,
                             schema
@@ -4387,35 +4786,39 @@ def show_beautiful_analysis_interface(db, company_id, company_name):
 
 def generate_pdf_report(analysis_results, company_name):
     """Generate downloadable PDF report with all analysis"""
+    if not REPORTLAB_AVAILABLE:
+        return _generate_text_report(analysis_results, company_name)
+    
     try:
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from io import BytesIO
-        
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        styles = getSampleStyleSheet()
-        story = []
+        # Fixed single-column layout, so draw directly instead of laying out Platypus flowables
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        page_width, page_height = A4
+        margin = 72
+        text_width = page_width - 2 * margin
+        y = page_height - margin
+        
+        def draw_line(text, font, size, leading, centered=False):
+            nonlocal y
+            if y - leading < margin:
+                pdf.showPage()
+                y = page_height - margin
+            y -= leading
+            pdf.setFont(font, size)
+            if centered:
+                pdf.drawCentredString(page_width / 2, y, text)
+            else:
+                pdf.drawString(margin, y, text)
         
         # Title
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        
-        story.append(Paragraph("Zenalyst.ai", title_style))
-        story.append(Paragraph(f"{company_name} - Investment Analysis Report", styles['Heading2']))
-        story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-        story.append(Spacer(1, 20))
+        draw_line("Zenalyst.ai", "Helvetica-Bold", 24, 30, centered=True)
+        y -= 30
+        draw_line(f"{company_name} - Investment Analysis Report", "Helvetica-Bold", 14, 20)
+        draw_line(f"Generated on {datetime.now().strftime('%B %d, %Y')}", "Helvetica", 10, 14)
+        y -= 20
         
         # Executive Summary Section
-        story.append(Paragraph("Executive Summary", styles['Heading2']))
+        draw_line("Executive Summary", "Helvetica-Bold", 14, 24)
         
         for tab_name, data in [
             ("Quarterly Revenue Analysis", analysis_results.get("quarterly", [])),
@@ -4425,12 +4828,12 @@ def generate_pdf_report(analysis_results, company_name):
             ("Monthly Trends Analysis", analysis_results.get("monthly", []))
         ]:
             if data:
-                story.append(Paragraph(tab_name, styles['Heading3']))
+                draw_line(tab_name, "Helvetica-Bold", 12, 20)
                 
                 # Generate summary for this section
                 if tab_name == "Quarterly Revenue Analysis":
                     total_customers = len(data)
-                    positive_growth = len([c for c in data if c.get('Percentage of Variance', 0) and c['Percentage of Variance'] > 0])
+                    positive_growth = sum(1 for c in data if (variance := c.get('Percentage of Variance')) and variance > 0)
                     summary_text = f"Analyzed {total_customers} customers with {positive_growth} showing positive growth ({positive_growth/total_customers*100:.1f}%)"
                 elif tab_name == "Geographic Analysis":
                     total_countries = len(data)
@@ -4439,17 +4842,26 @@ def generate_pdf_report(analysis_results, company_name):
                 else:
                     summary_text = f"Comprehensive analysis of {len(data)} data points providing strategic insights"
                 
-                story.append(Paragraph(summary_text, styles['Normal']))
-                story.append(Spacer(1, 12))
+                for wrapped in simpleSplit(summary_text, "Helvetica", 10, text_width):
+                    draw_line(wrapped, "Helvetica", 10, 12)
+                y -= 12
         
-        # Build PDF
-        doc.build(story)
-        buffer.seek(0)
+        pdf.save()
         return buffer.getvalue()
         
-    except ImportError:
-        # Fallback: Create simple text report if reportlab not available
-        report_content = f"""
+    except Exception as e:
+        st.error(f"Error generating report: {str(e)}")
+        return None
+
+def _generate_text_report(analysis_results, company_name):
+    """Plain-text report used when reportlab is not installed"""
+    quarterly_count = len(analysis_results.get('quarterly') or ())
+    bridge_count = len(analysis_results.get('bridge') or ())
+    geographic_count = len(analysis_results.get('geographic') or ())
+    customer_count = len(analysis_results.get('customer') or ())
+    monthly_count = len(analysis_results.get('monthly') or ())
+    
+    report_content = f"""
 ZENALYST.AI - INVESTMENT ANALYSIS REPORT
 {company_name}
 Generated on {datetime.now().strftime('%B %d, %Y')}
@@ -4457,23 +4869,23 @@ Generated on {datetime.now().strftime('%B %d, %Y')}
 === EXECUTIVE SUMMARY ===
 
 Quarterly Revenue Analysis:
-- {len(analysis_results.get('quarterly', []))} customers analyzed
+- {quarterly_count} customers analyzed
 - Comprehensive growth and variance analysis
 
 Revenue Bridge Analysis:
-- {len(analysis_results.get('bridge', []))} customer retention patterns
+- {bridge_count} customer retention patterns
 - Expansion and churn analysis
 
 Geographic Analysis:
-- {len(analysis_results.get('geographic', []))} countries/regions
+- {geographic_count} countries/regions
 - Market performance and opportunities
 
 Customer Analysis:
-- {len(analysis_results.get('customer', []))} customer concentration data
+- {customer_count} customer concentration data
 - Portfolio diversification assessment
 
 Monthly Trends Analysis:
-- {len(analysis_results.get('monthly', []))} months of data
+- {monthly_count} months of data
 - Seasonal patterns and forecasting
 
 === DETAILED ANALYSIS ===
@@ -4481,10 +4893,7 @@ Full analysis data and insights available in the interactive dashboard.
 
 Report generated by Zenalyst.ai Investment Analytics Platform
 """
-        return report_content.encode('utf-8')
-    except Exception as e:
-        st.error(f"Error generating report: {str(e)}")
-        return None
+    return report_content.encode('utf-8')
 
 def save_analysis_as_json(analysis_results, company_name):
     """Save analysis as downloadable JSON with metadata"""
@@ -4503,7 +4912,18 @@ def save_analysis_as_json(analysis_results, company_name):
             }
         }
         
-        return json.dumps(analysis_export, indent=2, default=str)
+        if orjson is not None:
+            try:
+                # Both paths return UTF-8 bytes, which go straight to st.download_button
+                # numpy values and datetimes encode natively; json_serializer only sees the leftovers
+                return orjson.dumps(
+                    analysis_export,
+                    default=json_serializer,
+                    option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+                )
+            except orjson.JSONEncodeError:
+                pass  # e.g. integers beyond 64 bits; the stdlib encoder handles them
+        return json.dumps(analysis_export, indent=2, default=json_serializer).encode('utf-8')
     except Exception as e:
         st.error(f"Error saving analysis: {str(e)}")
         return None
@@ -4608,32 +5028,34 @@ def investee_dashboard(db):
             progress_bar = st.progress(0)
             status_text = st.empty()
             
-            for i, uploaded_file in enumerate(uploaded_files):
+            status_text.text(f"Uploading {len(uploaded_files)} file(s)...")
+            
+            # Uploads run in parallel; results arrive here in completion order
+            uploaded_rows = []
+            for i, (uploaded_file, s3_key, upload_error) in enumerate(s3_storage.upload_files(uploaded_files, company_id)):
                 try:
+                    if upload_error:
+                        raise upload_error
+                    
                     file_name = uploaded_file.name
-                    file_size = uploaded_file.size
                     file_type = file_name.split('.')[-1].lower()
                     
-                    status_text.text(f"Uploading {file_name}...")
-                    progress_bar.progress((i) / len(uploaded_files))
-                    
-                    # Upload file to S3
-                    s3_key = s3_storage.upload_file(uploaded_file, company_id, file_name)
-                    
-                    # Save file metadata to database
-                    file_id = db.save_uploaded_file(
-                        company_id=company_id,
-                        original_filename=file_name,
-                        s3_key=s3_key,
-                        file_type=file_type,
-                        file_size=file_size
-                    )
-                    
+                    # Metadata is written in one batch once every upload has finished
+                    uploaded_rows.append((company_id, file_name, s3_key, file_type, uploaded_file.size))
                     progress_bar.progress((i + 1) / len(uploaded_files))
-                    st.success(f"✅ {file_name} uploaded successfully!")
                     
                 except Exception as e:
                     st.error(f"❌ Error uploading {uploaded_file.name}: {str(e)}")
+            
+            if uploaded_rows:
+                try:
+                    db.save_uploaded_files(uploaded_rows)
+                    for row in uploaded_rows:
+                        st.success(f"✅ {row[1]} uploaded successfully!")
+                except Exception as e:
+                    # The batch is one transaction, so none of these files were recorded
+                    unrecorded = ', '.join(row[1] for row in uploaded_rows)
+                    st.error(f"❌ Uploaded to storage but not recorded ({unrecorded}): {str(e)}")
                     
             status_text.text("Upload complete!")
             progress_bar.empty()
@@ -4775,10 +5197,6 @@ def investor_dashboard(db):
             return
         
         # Dynamic Dashboard Generation - adapts to any JSON structure
-        if not company_data:
-            st.warning("No data files found for this company in S3.")
-            return
-            
         # Initialize dynamic dashboard generator
         dashboard_generator = DynamicDashboardGenerator()
         schema_analyzer = JSONSchemaAnalyzer()
@@ -4796,11 +5214,7 @@ def investor_dashboard(db):
                     
                     # Analyze schema for this data
                     schema = schema_analyzer.analyze_json_schema(json_data, data_key)
-                    tab_schemas[tab_name] = {
-                        'data': json_data,
-                        'schema': schema,
-                        'key': data_key
-                    }
+                    tab_schemas[tab_name] = (json_data, schema, data_key)
                 except Exception as e:
                     st.error(f"❌ Error processing {data_key}: {str(e)}")
                     continue
@@ -4815,10 +5229,7 @@ def investor_dashboard(db):
         # Generate content for each tab dynamically
         for i, tab_name in enumerate(tab_names):
             with tabs[i]:
-                tab_info = tab_schemas[tab_name]
-                json_data = tab_info['data']
-                schema = tab_info['schema']
-                data_key = tab_info['key']
+                json_data, schema, data_key = tab_schemas[tab_name]
                 
                 try:
                     # Generate complete tab layout using existing dynamic system
@@ -4834,187 +5245,260 @@ def investor_dashboard(db):
                     st.error(f"❌ Error displaying {tab_name}: {str(e)}")
                     st.write("💡 Please check the data format or contact support if this issue persists.")
     
-def generate_adaptive_executive_summary(json_data, schema, tab_name):
-    """Generate dynamic executive summary for any JSON data structure"""
+def _hash_records(records):
+    """Cheap content hash for record lists passed to cached functions"""
+    if orjson is not None:
+        payload = orjson.dumps(records, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        payload = json.dumps(records, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+@st.cache_data(ttl=3600, show_spinner=False, hash_funcs={list: _hash_records})
+def generate_adaptive_executive_summary(json_data, _schema, tab_name):
+    """Generate dynamic executive summary for any JSON data structure; cached per data and tab"""
     if not json_data or not isinstance(json_data, list) or len(json_data) == 0:
         return f"Analysis summary for {tab_name} - No data available for detailed analysis."
     
     try:
-        df = pd.DataFrame(json_data)
-        data_patterns = detect_business_patterns(json_data, schema, tab_name)
+        # Records share one schema, so the first record's keys index the columns;
+        # pairs rather than a dict, so names differing only by case stay distinct
+        col_pairs = tuple((str(col).lower(), col) for col in json_data[0]) if isinstance(json_data[0], dict) else ()
+        data_patterns = detect_business_patterns([lower for lower, _ in col_pairs], tab_name)
         
-        # Generate summary based on detected patterns
+        if not data_patterns:
+            # Counts come straight from the records; no DataFrame needed
+            return generate_generic_business_summary(json_data, tab_name)
+        
+        # One DataFrame serves whichever specific summary applies
+        df = pd.DataFrame(json_data)
         if 'revenue_bridge' in data_patterns:
-            return generate_revenue_bridge_summary(df, tab_name)
+            return generate_revenue_bridge_summary(df, tab_name, col_pairs)
         elif 'customer_analysis' in data_patterns:
-            return generate_customer_analysis_summary(df, tab_name)
+            return generate_customer_analysis_summary(df, tab_name, col_pairs)
         elif 'geographic' in data_patterns:
-            return generate_geographic_summary(df, tab_name)
+            return generate_geographic_summary(df, tab_name, col_pairs)
         elif 'quarterly' in data_patterns:
-            return generate_quarterly_summary(df, tab_name)
-        elif 'time_series' in data_patterns:
-            return generate_time_series_summary(df, tab_name)
+            return generate_quarterly_summary(df, tab_name, col_pairs)
         else:
-            return generate_generic_business_summary(df, tab_name)
+            return generate_time_series_summary(df, tab_name, col_pairs)
             
     except Exception as e:
         return f"Executive Summary for {tab_name}: Data contains {len(json_data)} records. Detailed analysis available through AI chat."
 
-def detect_business_patterns(json_data, schema, tab_name):
-    """Detect business data patterns for appropriate summary generation"""
-    patterns = []
-    
-    if not json_data or not isinstance(json_data, list):
-        return patterns
+# Column-name fragments for each business pattern, checked in priority order
+BRIDGE_PATTERN_TERMS = ('new revenue', 'expansion', 'churn', 'contraction')
+CUSTOMER_PATTERN_TERMS = ('customer name', 'customer', 'client')
+GEOGRAPHIC_PATTERN_TERMS = ('country', 'region', 'state', 'location')
+QUARTERLY_PATTERN_TERMS = ('quarter 3', 'quarter 4', 'q3', 'q4')
+TIME_SERIES_PATTERN_TERMS = ('month', 'date', 'time', 'year')
+
+# (pattern, column terms, tab-name terms); the first matching rule wins
+BUSINESS_PATTERN_RULES = (
+    ('revenue_bridge', BRIDGE_PATTERN_TERMS, ('bridge',)),
+    ('customer_analysis', CUSTOMER_PATTERN_TERMS, ('customer',)),
+    ('geographic', GEOGRAPHIC_PATTERN_TERMS, ('country', 'geographic')),
+    ('quarterly', QUARTERLY_PATTERN_TERMS, ('quarterly',)),
+    ('time_series', TIME_SERIES_PATTERN_TERMS, ('monthly',)),
+)
+
+def detect_business_patterns(columns, tab_name):
+    """Detect business data patterns from lowercase column names for appropriate summary generation"""
+    if not columns:
+        return []
     
-    # Analyze column names
-    df = pd.DataFrame(json_data)
-    columns = [col.lower() for col in df.columns]
+    # Analyze column names as one string so each term is a single substring scan
+    joined_columns = ' '.join(columns)
     tab_lower = tab_name.lower()
     
-    # Revenue bridge detection
-    if any(term in ' '.join(columns) for term in ['new revenue', 'expansion', 'churn', 'contraction']) or 'bridge' in tab_lower:
-        patterns.append('revenue_bridge')
-    
-    # Customer analysis detection
-    elif any(term in ' '.join(columns) for term in ['customer name', 'customer', 'client']) or 'customer' in tab_lower:
-        patterns.append('customer_analysis')
-    
-    # Geographic detection
-    elif any(term in ' '.join(columns) for term in ['country', 'region', 'state', 'location']) or 'country' in tab_lower or 'geographic' in tab_lower:
-        patterns.append('geographic')
-    
-    # Quarterly detection
-    elif any(term in ' '.join(columns) for term in ['quarter 3', 'quarter 4', 'q3', 'q4']) or 'quarterly' in tab_lower:
-        patterns.append('quarterly')
-    
-    # Time series detection
-    elif any(term in ' '.join(columns) for term in ['month', 'date', 'time', 'year']) or 'monthly' in tab_lower:
-        patterns.append('time_series')
-    
-    return patterns
+    for pattern, column_terms, tab_terms in BUSINESS_PATTERN_RULES:
+        if any(term in joined_columns for term in column_terms) or any(term in tab_lower for term in tab_terms):
+            return [pattern]
+    return []
+
+# Markdown layouts for the rule-based executive summaries; filled with format_map
+SUMMARY_TEMPLATES = {
+    'revenue_bridge': """**{tab_name} Executive Summary**
+
+🎯 **Revenue Performance**: Q3 to Q4 revenue {direction} by ${abs_growth:,.0f} ({growth_pct:+.1f}%)
+
+📊 **Key Metrics**:
+• Q3 Revenue: ${q3_total:,.0f}
+• Q4 Revenue: ${q4_total:,.0f}
+• Net Change: ${growth:+,.0f}
+
+🔍 **Analysis**: Revenue bridge analysis shows detailed flow from Q3 to Q4 with expansion, contraction, and churn components.""",
+
+    'customer_analysis': """**{tab_name} Executive Summary**
+
+💰 **Revenue Overview**: ${total_revenue:,.0f} across {total_customers} customers
+
+🏆 **Top Performance**:
+• Largest Customer: {top_customer} (${top_customer_revenue:,.0f})
+• Average Revenue per Customer: ${avg_revenue:,.0f}
+• Top 5 Customer Concentration: {concentration:.1f}%
+
+⚠️ **Risk Assessment**: {risk} concentration risk""",
+
+    'geographic': """**{tab_name} Executive Summary**
+
+🌍 **Global Revenue**: ${total_revenue:,.0f} across {countries_count} markets
+
+🥇 **Market Leaders**:
+• Top Market: {top_country} (${top_country_revenue:,.0f})
+• Top 3 Markets Share: {top_3_share:.1f}% of total revenue
+
+📈 **Geographic Insights**: Revenue distribution analysis shows market concentration and expansion opportunities.""",
 
-def generate_revenue_bridge_summary(df, tab_name):
+    'quarterly': """**{tab_name} Executive Summary**
+
+📊 **Quarterly Performance**: {performance} from Q3 to Q4
+
+🎯 **Key Results**:
+• Q4 vs Q3 Growth: {growth_pct:+.1f}% (${growth:+,.0f})
+• Total Q4 Revenue: ${q4_total:,.0f}
+• Best Performer: {best_performer}
+
+💡 **Insights**: Detailed quarter-over-quarter analysis reveals performance patterns and growth opportunities.""",
+
+    'time_series': """**{tab_name} Executive Summary**
+
+📈 **Time Series Performance**: {periods} periods totaling ${total_revenue:,.0f}
+
+🎯 **Trend Analysis**:
+• Average per Period: ${avg_period:,.0f}
+• Overall Growth: {total_growth:+.1f}%
+• Data Span: {periods} time periods
+
+💡 **Insights**: Time-based analysis reveals trends, seasonality, and growth patterns.""",
+
+    'generic_numeric': """**{tab_name} Executive Summary**
+
+📋 **Dataset Overview**: {records} records with {columns} attributes
+
+📊 **Key Metrics**:
+• Total Records: {records:,}
+• Data Attributes: {columns}
+• Numeric Data Points: {numeric_count}
+
+💡 **Available Analysis**: Comprehensive data exploration and insights available through AI chat interface.""",
+
+    'generic': """**{tab_name} Executive Summary**
+
+📋 **Dataset**: {records} records with {columns} attributes available for analysis.
+
+💡 **Insights**: Detailed analysis and insights available through the AI chat interface.""",
+}
+
+def generate_revenue_bridge_summary(df, tab_name, col_pairs):
     """Generate summary for revenue bridge data"""
     try:
         # Find revenue columns
-        revenue_cols = [col for col in df.columns if 'revenue' in col.lower()]
+        revenue_cols = [(lower, col) for lower, col in col_pairs if 'revenue' in lower]
         if len(revenue_cols) >= 2:
-            q3_col = next((col for col in revenue_cols if 'quarter 3' in col.lower() or 'q3' in col.lower()), revenue_cols[0])
-            q4_col = next((col for col in revenue_cols if 'quarter 4' in col.lower() or 'q4' in col.lower()), revenue_cols[-1])
+            q3_col = next((col for lower, col in revenue_cols if 'quarter 3' in lower or 'q3' in lower), revenue_cols[0][1])
+            q4_col = next((col for lower, col in revenue_cols if 'quarter 4' in lower or 'q4' in lower), revenue_cols[-1][1])
             
             q3_total = df[q3_col].sum()
             q4_total = df[q4_col].sum()
             growth = q4_total - q3_total
             growth_pct = (growth / q3_total * 100) if q3_total > 0 else 0
             
-            return f"""**{tab_name} Executive Summary**
-
-🎯 **Revenue Performance**: Q3 to Q4 revenue {'increased' if growth > 0 else 'decreased'} by ${abs(growth):,.0f} ({growth_pct:+.1f}%)
-
-📊 **Key Metrics**:
-• Q3 Revenue: ${q3_total:,.0f}
-• Q4 Revenue: ${q4_total:,.0f}
-• Net Change: ${growth:+,.0f}
-
-🔍 **Analysis**: Revenue bridge analysis shows detailed flow from Q3 to Q4 with expansion, contraction, and churn components."""
+            return SUMMARY_TEMPLATES['revenue_bridge'].format_map({
+                'tab_name': tab_name, 'direction': 'increased' if growth > 0 else 'decreased',
+                'abs_growth': abs(growth), 'growth_pct': growth_pct,
+                'q3_total': q3_total, 'q4_total': q4_total, 'growth': growth,
+            })
         else:
             return f"**{tab_name} Executive Summary**: Revenue bridge data with {len(df)} records available for analysis."
     except:
         return f"**{tab_name} Executive Summary**: Revenue analysis data available for detailed review."
 
-def generate_customer_analysis_summary(df, tab_name):
+def generate_customer_analysis_summary(df, tab_name, col_pairs):
     """Generate summary for customer analysis data"""
     try:
-        revenue_col = next((col for col in df.columns if 'revenue' in col.lower()), None)
-        customer_col = next((col for col in df.columns if 'customer' in col.lower() or 'client' in col.lower()), None)
+        revenue_col = next((col for lower, col in col_pairs if 'revenue' in lower), None)
+        customer_col = next((col for lower, col in col_pairs if 'customer' in lower or 'client' in lower), None)
         
         if revenue_col and customer_col:
-            total_revenue = df[revenue_col].sum()
+            # Reduce over one float array instead of separate pandas sum/idxmax/nlargest passes
+            revenue = df[revenue_col].to_numpy(dtype=np.float64)
+            valid_revenue = revenue[~np.isnan(revenue)]
+            total_revenue = valid_revenue.sum()
             total_customers = len(df)
             avg_revenue = total_revenue / total_customers if total_customers > 0 else 0
-            top_customer = df.loc[df[revenue_col].idxmax()]
-            top_5_revenue = df.nlargest(5, revenue_col)[revenue_col].sum()
+            top_customer = df.iloc[int(np.nanargmax(revenue))]
+            top_5_revenue = _top_k_sum(valid_revenue, 5)
             concentration = (top_5_revenue / total_revenue * 100) if total_revenue > 0 else 0
             
-            return f"""**{tab_name} Executive Summary**
-
-💰 **Revenue Overview**: ${total_revenue:,.0f} across {total_customers} customers
-
-🏆 **Top Performance**:
-• Largest Customer: {top_customer[customer_col]} (${top_customer[revenue_col]:,.0f})
-• Average Revenue per Customer: ${avg_revenue:,.0f}
-• Top 5 Customer Concentration: {concentration:.1f}%
-
-⚠️ **Risk Assessment**: {'High' if concentration > 80 else 'Medium' if concentration > 60 else 'Low'} concentration risk"""
+            return SUMMARY_TEMPLATES['customer_analysis'].format_map({
+                'tab_name': tab_name, 'total_revenue': total_revenue, 'total_customers': total_customers,
+                'top_customer': top_customer[customer_col], 'top_customer_revenue': top_customer[revenue_col],
+                'avg_revenue': avg_revenue, 'concentration': concentration,
+                'risk': 'High' if concentration > 80 else 'Medium' if concentration > 60 else 'Low',
+            })
         else:
             return f"**{tab_name} Executive Summary**: Customer analysis with {len(df)} records available."
     except:
         return f"**{tab_name} Executive Summary**: Customer data analysis available for detailed review."
 
-def generate_geographic_summary(df, tab_name):
+def generate_geographic_summary(df, tab_name, col_pairs):
     """Generate summary for geographic data"""
     try:
-        country_col = next((col for col in df.columns if 'country' in col.lower() or 'region' in col.lower()), None)
-        revenue_col = next((col for col in df.columns if 'revenue' in col.lower()), None)
+        country_col = next((col for lower, col in col_pairs if 'country' in lower or 'region' in lower), None)
+        revenue_col = next((col for lower, col in col_pairs if 'revenue' in lower), None)
         
         if country_col and revenue_col:
-            total_revenue = df[revenue_col].sum()
+            revenue = df[revenue_col].to_numpy(dtype=np.float64)
+            valid_revenue = revenue[~np.isnan(revenue)]
+            total_revenue = valid_revenue.sum()
             countries_count = df[country_col].nunique()
-            top_country = df.loc[df[revenue_col].idxmax()]
-            top_3_revenue = df.nlargest(3, revenue_col)[revenue_col].sum()
+            top_country = df.iloc[int(np.nanargmax(revenue))]
+            top_3_revenue = _top_k_sum(valid_revenue, 3)
             top_3_share = (top_3_revenue / total_revenue * 100) if total_revenue > 0 else 0
             
-            return f"""**{tab_name} Executive Summary**
-
-🌍 **Global Revenue**: ${total_revenue:,.0f} across {countries_count} markets
-
-🥇 **Market Leaders**:
-• Top Market: {top_country[country_col]} (${top_country[revenue_col]:,.0f})
-• Top 3 Markets Share: {top_3_share:.1f}% of total revenue
-
-📈 **Geographic Insights**: Revenue distribution analysis shows market concentration and expansion opportunities."""
+            return SUMMARY_TEMPLATES['geographic'].format_map({
+                'tab_name': tab_name, 'total_revenue': total_revenue, 'countries_count': countries_count,
+                'top_country': top_country[country_col], 'top_country_revenue': top_country[revenue_col],
+                'top_3_share': top_3_share,
+            })
         else:
             return f"**{tab_name} Executive Summary**: Geographic analysis with {len(df)} markets."
     except:
         return f"**{tab_name} Executive Summary**: Geographic revenue analysis available."
 
-def generate_quarterly_summary(df, tab_name):
+def generate_quarterly_summary(df, tab_name, col_pairs):
     """Generate summary for quarterly data"""
     try:
-        q3_col = next((col for col in df.columns if 'quarter 3' in col.lower() or 'q3' in col.lower()), None)
-        q4_col = next((col for col in df.columns if 'quarter 4' in col.lower() or 'q4' in col.lower()), None)
+        q3_col = next((col for lower, col in col_pairs if 'quarter 3' in lower or 'q3' in lower), None)
+        q4_col = next((col for lower, col in col_pairs if 'quarter 4' in lower or 'q4' in lower), None)
         
         if q3_col and q4_col:
-            q3_total = df[q3_col].sum()
-            q4_total = df[q4_col].sum()
+            q3_values = df[q3_col].to_numpy(dtype=np.float64)
+            q4_values = df[q4_col].to_numpy(dtype=np.float64)
+            q3_total = np.nansum(q3_values)
+            q4_total = np.nansum(q4_values)
             growth = q4_total - q3_total
             growth_pct = (growth / q3_total * 100) if q3_total > 0 else 0
             
-            # Growth leaders
-            df['growth'] = df[q4_col] - df[q3_col]
-            top_growth = df.nlargest(1, 'growth').iloc[0]
+            # Growth leaders, computed on arrays so the shared df is left untouched
+            top_growth = df.iloc[int(np.nanargmax(q4_values - q3_values))]
             
-            return f"""**{tab_name} Executive Summary**
-
-📊 **Quarterly Performance**: {'Strong growth' if growth_pct > 10 else 'Moderate growth' if growth_pct > 0 else 'Decline'} from Q3 to Q4
-
-🎯 **Key Results**:
-• Q4 vs Q3 Growth: {growth_pct:+.1f}% (${growth:+,.0f})
-• Total Q4 Revenue: ${q4_total:,.0f}
-• Best Performer: {top_growth.iloc[0] if len(df.columns) > 0 else 'N/A'}
-
-💡 **Insights**: Detailed quarter-over-quarter analysis reveals performance patterns and growth opportunities."""
+            return SUMMARY_TEMPLATES['quarterly'].format_map({
+                'tab_name': tab_name,
+                'performance': 'Strong growth' if growth_pct > 10 else 'Moderate growth' if growth_pct > 0 else 'Decline',
+                'growth_pct': growth_pct, 'growth': growth, 'q4_total': q4_total,
+                'best_performer': top_growth.iloc[0] if len(df.columns) > 0 else 'N/A',
+            })
         else:
             return f"**{tab_name} Executive Summary**: Quarterly performance data for {len(df)} entities."
     except:
         return f"**{tab_name} Executive Summary**: Quarterly analysis available for detailed review."
 
-def generate_time_series_summary(df, tab_name):
+def generate_time_series_summary(df, tab_name, col_pairs):
     """Generate summary for time series data"""
     try:
-        date_col = next((col for col in df.columns if 'month' in col.lower() or 'date' in col.lower()), None)
-        revenue_col = next((col for col in df.columns if 'revenue' in col.lower() or 'amount' in col.lower()), None)
+        date_col = next((col for lower, col in col_pairs if 'month' in lower or 'date' in lower), None)
+        revenue_col = next((col for lower, col in col_pairs if 'revenue' in lower or 'amount' in lower), None)
         
         if date_col and revenue_col:
             total_revenue = df[revenue_col].sum()
@@ -5029,105 +5513,117 @@ def generate_time_series_summary(df, tab_name):
             else:
                 total_growth = 0
             
-            return f"""**{tab_name} Executive Summary**
-
-📈 **Time Series Performance**: {periods} periods totaling ${total_revenue:,.0f}
-
-🎯 **Trend Analysis**:
-• Average per Period: ${avg_period:,.0f}
-• Overall Growth: {total_growth:+.1f}%
-• Data Span: {periods} time periods
-
-💡 **Insights**: Time-based analysis reveals trends, seasonality, and growth patterns."""
+            return SUMMARY_TEMPLATES['time_series'].format_map({
+                'tab_name': tab_name, 'periods': periods, 'total_revenue': total_revenue,
+                'avg_period': avg_period, 'total_growth': total_growth,
+            })
         else:
             return f"**{tab_name} Executive Summary**: Time series data with {len(df)} data points."
     except:
         return f"**{tab_name} Executive Summary**: Time-based analysis available for review."
 
-def generate_generic_business_summary(df, tab_name):
-    """Generate generic business summary for unknown data types"""
-    try:
-        records = len(df)
-        columns = len(df.columns)
-        
-        # Find numeric columns
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        if len(numeric_cols) > 0:
-            total_value = df[numeric_cols].sum().sum()
-            avg_value = total_value / records if records > 0 else 0
-            
-            return f"""**{tab_name} Executive Summary**
+def generate_generic_business_summary(json_data, tab_name):
+    """Generate generic business summary for unknown data types from the raw records"""
+    if not isinstance(json_data, list):
+        return f"**{tab_name} Executive Summary**: Business data analysis available for detailed review."
+    
+    records = len(json_data)
+    first_record = json_data[0] if records and isinstance(json_data[0], dict) else {}
+    columns = len(first_record)
+    
+    # Find numeric columns from the records only; the schema is not part of the cached summary's key
+    numeric_cols = [key for key, value in first_record.items()
+                    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool)]
+    if len(numeric_cols) > 0:
+        return SUMMARY_TEMPLATES['generic_numeric'].format_map({
+            'tab_name': tab_name, 'records': records, 'columns': columns, 'numeric_count': len(numeric_cols),
+        })
+    else:
+        return SUMMARY_TEMPLATES['generic'].format_map({'tab_name': tab_name, 'records': records, 'columns': columns})
 
-📋 **Dataset Overview**: {records} records with {columns} attributes
+def _suggestion_column_features(column_names, column_types):
+    """Lowercase the column names and dtypes once into searchable strings"""
+    return ' '.join(name.lower() for name in column_names), ' '.join(column_types)
 
-📊 **Key Metrics**:
-• Total Records: {records:,}
-• Data Attributes: {columns}
-• Numeric Data Points: {len(numeric_cols)}
+# Suggestion question groups; entries with {tab_name} are formatted when yielded
+TIME_SERIES_SUGGESTIONS = (
+    "What are the key trends in this time series data?",
+    "Show me the growth pattern over time",
+    "What are the highest and lowest periods?",
+)
+REVENUE_SUGGESTIONS = (
+    "What is the total revenue and growth rate?",
+    "Show me revenue performance analysis",
+    "What factors influenced revenue changes?",
+)
+VARIANCE_SUGGESTIONS = (
+    "Explain the variance patterns",
+    "What caused the significant variances?",
+    "How does variance impact overall performance?",
+)
+CATEGORICAL_SUGGESTIONS = (
+    "What are the key categories in {tab_name}?",
+    "Show me the distribution breakdown",
+)
+NUMERICAL_SUGGESTIONS = (
+    "What are the key statistics and metrics?",
+    "Show me the correlation analysis",
+)
 
-💡 **Available Analysis**: Comprehensive data exploration and insights available through AI chat interface."""
-        else:
-            return f"""**{tab_name} Executive Summary**
+def _iter_dynamic_suggestions(data_type, joined_columns, type_str, tab_name):
+    """Yield suggestion candidates in priority order; later checks only run if more are needed"""
+    # Generate suggestions based on detected data patterns
+    if data_type == 'time_series' or 'date' in type_str:
+        yield from TIME_SERIES_SUGGESTIONS
+    
+    if 'revenue' in joined_columns:
+        yield from REVENUE_SUGGESTIONS
+    
+    if 'variance' in joined_columns:
+        yield from VARIANCE_SUGGESTIONS
+    
+    # Generic suggestions based on data type
+    if data_type == 'categorical':
+        yield from (suggestion.format(tab_name=tab_name) for suggestion in CATEGORICAL_SUGGESTIONS)
+    elif data_type == 'numerical':
+        yield from NUMERICAL_SUGGESTIONS
 
-📋 **Dataset**: {records} records with {columns} attributes available for analysis.
+def _default_suggestions(tab_name):
+    """Yield the generic fallback questions"""
+    yield f"What insights can you provide about {tab_name}?"
+    yield "Summarize the key findings"
+    yield "What are the most important metrics?"
 
-💡 **Insights**: Detailed analysis and insights available through the AI chat interface."""
-    except:
-        return f"**{tab_name} Executive Summary**: Business data analysis available for detailed review."
+@st.cache_data(ttl=3600, max_entries=64, show_spinner=False)
+def _cached_dynamic_suggestions(data_type, column_names, column_types, tab_name):
+    """Build the suggestion list from hashable schema parts so reruns hit the cache"""
+    joined_columns, type_str = _suggestion_column_features(column_names, column_types)
+    
+    # Default suggestions only stand in when the schema yields nothing at all
+    candidates = _iter_dynamic_suggestions(data_type, joined_columns, type_str, tab_name)
+    first = next(candidates, None)
+    suggestions = itertools.chain((first,), candidates) if first is not None else _default_suggestions(tab_name)
+    
+    # Return top 5 suggestions, stopping as soon as they are found
+    return list(itertools.islice(suggestions, 5))
 
 def _generate_dynamic_suggestions(schema, tab_name):
     """Generate relevant question suggestions based on schema analysis"""
-    suggestions = []
-    
     if not schema:
         return ["What insights can you provide about this data?"]
     
-    data_type = schema.get('data_type', 'general')
-    columns = schema.get('columns', {})
+    schema_get = schema.get
+    data_type = schema_get('data_type', 'general')
+    columns = schema_get('columns', {})
     
-    # Generate suggestions based on detected data patterns
-    if data_type == 'time_series' or any('date' in col_info.get('type', '') for col_info in columns.values()):
-        suggestions.extend([
-            "What are the key trends in this time series data?",
-            "Show me the growth pattern over time",
-            "What are the highest and lowest periods?"
-        ])
-    
-    if any('revenue' in col.lower() for col in columns.keys()):
-        suggestions.extend([
-            "What is the total revenue and growth rate?",
-            "Show me revenue performance analysis",
-            "What factors influenced revenue changes?"
-        ])
-    
-    if any('variance' in col.lower() for col in columns.keys()):
-        suggestions.extend([
-            "Explain the variance patterns",
-            "What caused the significant variances?",
-            "How does variance impact overall performance?"
-        ])
-    
-    # Generic suggestions based on data type
-    if data_type == 'categorical':
-        suggestions.extend([
-            f"What are the key categories in {tab_name}?",
-            "Show me the distribution breakdown"
-        ])
-    elif data_type == 'numerical':
-        suggestions.extend([
-            "What are the key statistics and metrics?",
-            "Show me the correlation analysis"
-        ])
-    
-    # Default suggestions
-    if not suggestions:
-        suggestions = [
-            f"What insights can you provide about {tab_name}?",
-            "Summarize the key findings",
-            "What are the most important metrics?"
-        ]
+    # One pass over the columns; JSONSchemaAnalyzer records each pandas dtype under 'data_type'
+    column_names = []
+    types = []
+    for col, col_info in columns.items():
+        column_names.append(str(col))
+        types.append(col_info.get('data_type', ''))
     
-    return suggestions[:5]  # Return top 5 suggestions
+    return _cached_dynamic_suggestions(data_type, tuple(column_names), tuple(types), tab_name)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file